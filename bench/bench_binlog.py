@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Bytes per alert and encode/decode throughput: JSONL vs the --binlog format.
+
+  python bench/bench_binlog.py
+  python bench/bench_binlog.py --alerts 100000 --devices 500
+
+Alerts come from a fixed pool of `--devices` BSSIDs, one cycle (shared
+timestamp) every 2 s, like a sensor watching the same drones for a while.
+Sizes are also given after gzip, which is what retired segments get.
+"""
+import argparse
+import gzip
+import io
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent / "tools"))
+sys.path.insert(0, str(HERE))
+import dronescan  # noqa: E402
+import synth  # noqa: E402
+
+def make_alerts(n: int, devices: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    pool = [synth.rand_mac(rng, rng.choice(synth.DRONE_OUIS)) for _ in range(devices)]
+    ssids = {b: rng.choice(synth.DRONE_SSIDS).format(n=rng.randrange(1 << 12)) for b in pool}
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    alerts = []
+    for i in range(n):
+        ts = (start + timedelta(seconds=2 * (i // 50))).isoformat(timespec="seconds").replace("+00:00", "Z")
+        bssid = rng.choice(pool)
+        p = synth.alert_payload(rng, bssid, ts)
+        p["ssid"] = ssids[bssid]
+        alerts.append(p)
+    return alerts
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser(description="Binary sighting log benchmark")
+    ap.add_argument("--alerts", type=int, default=100000)
+    ap.add_argument("--devices", type=int, default=500)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    alerts = make_alerts(args.alerts, args.devices, args.seed)
+    n = len(alerts)
+
+    jsonl, t_jenc = timed(lambda: "".join(json.dumps(p) + "\n" for p in alerts).encode())
+    _, t_jdec = timed(lambda: [json.loads(line) for line in jsonl.splitlines()])
+
+    def encode():
+        enc = dronescan.BinaryLogEncoder()
+        return enc.header() + b"".join(map(enc.encode, alerts))
+    binary, t_benc = timed(encode)
+    decoded, t_bdec = timed(lambda: list(dronescan.read_binary_log(io.BytesIO(binary))))
+    if decoded != alerts:
+        sys.exit("[ERROR] binary round trip does not reproduce the input")
+
+    print(f"{n} alerts, {args.devices} devices")
+    print(f"{'format':>7} {'B/alert':>8} {'gz B/alert':>11} {'encode/s':>10} {'decode/s':>10}")
+    for name, data, t_enc, t_dec in (("jsonl", jsonl, t_jenc, t_jdec), ("binary", binary, t_benc, t_bdec)):
+        gz = len(gzip.compress(data))
+        print(f"{name:>7} {len(data) / n:>8.1f} {gz / n:>11.1f} {n / t_enc:>10,.0f} {n / t_dec:>10,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Memory and throughput of one cycle's AP snapshot: dict-per-row vs --columnar.
+
+  python bench/bench_columnar.py
+  python bench/bench_columnar.py --sizes 1000,10000,100000
+
+Measures CSV rows -> snapshot -> severity for every row. Peak memory is the
+tracemalloc high-water mark while the snapshot is alive (traced in a separate,
+untimed run).
+"""
+import argparse
+import csv
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent / "tools"))
+sys.path.insert(0, str(HERE))
+import dronescan  # noqa: E402
+import synth  # noqa: E402
+
+def build_classifier() -> dronescan.Classifier:
+    matcher = dronescan.CachedSSIDMatcher(dronescan.SSIDMatcher(dronescan.load_ssid_rules()), maxsize=0)
+    return dronescan.Classifier(dronescan.load_ouis(include_modules=False), matcher)
+
+def run_dicts(lines, classifier):
+    aps = [r for r in map(dronescan._ap_row, csv.reader(lines)) if r]
+    sev = [classifier.classify(r["mac"], r["essid"])[0] for r in aps]
+    return aps, sev
+
+def run_columnar(np, lines, classifier):
+    cols = dronescan.APColumns(np, csv.reader(lines))
+    codes, _, _ = classifier.classify_columns(np, cols)
+    return cols, codes
+
+def measure(fn, *args):
+    """(seconds, peak bytes); timed and traced in separate runs since tracemalloc is slow."""
+    gc.collect()
+    t0 = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - t0
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, peak
+
+def main():
+    ap = argparse.ArgumentParser(description="Columnar snapshot benchmark")
+    ap.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated row counts")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    np = dronescan.load_numpy()
+    if np is None:
+        sys.exit("[ERROR] NumPy is not installed; the columnar backend is unavailable")
+
+    classifier = build_classifier()
+    print(f"{'rows':>7} {'dict MiB':>9} {'dict rows/s':>12} {'col MiB':>8} {'col rows/s':>11}")
+    for n in (int(x) for x in args.sizes.split(",")):
+        lines = synth.ap_lines(n, random.Random(args.seed))
+        # Warm the airodump timestamp memo so both sides pay the same conversion cost.
+        run_columnar(np, lines[:100], classifier)
+        t_dict, m_dict = measure(run_dicts, lines, classifier)
+        t_col, m_col = measure(run_columnar, np, lines, classifier)
+        print(f"{n:>7} {m_dict / 2**20:>9.1f} {n / t_dict:>12,.0f} {m_col / 2**20:>8.1f} {n / t_col:>11,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark OUI matching: the old 'XX:XX:XX' string set vs MACPrefixIndex.
+
+  python bench/bench_oui_lookup.py
+  python bench/bench_oui_lookup.py --macs 500000 --prefixes 5000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "tools"))
+import dronescan  # noqa: E402
+
+def rand_mac(rng: random.Random, prefix: str | None = None) -> str:
+    octets = [f"{rng.randrange(256):02X}" for _ in range(6)]
+    if prefix:
+        octets[:3] = prefix.split(":")
+    return ":".join(octets)
+
+def mac_to_oui(mac: str) -> str:
+    """The scanner's old 24-bit-only lookup key, kept here as the baseline."""
+    mac = (mac or "").strip().upper().replace("-", ":")
+    if len(mac) != 17 or mac.count(":") != 5:
+        return ""
+    return ":".join(mac.split(":")[:3])
+
+def main():
+    ap = argparse.ArgumentParser(description="OUI lookup benchmark")
+    ap.add_argument("--macs", type=int, default=200000, help="BSSIDs looked up (default: 200000)")
+    ap.add_argument("--prefixes", type=int, default=1000, help="24-bit OUIs in the table (default: 1000)")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    rng = random.Random(args.seed)
+
+    ouis = sorted({rand_mac(rng)[:8] for _ in range(args.prefixes)})
+    legacy = set(ouis)
+    index = dronescan.MACPrefixIndex()
+    for oui in ouis:
+        index.add(*dronescan.parse_mac_prefix(oui))
+    # A few sub-allocations so the 28/36-bit tables are exercised too.
+    for oui in ouis[:50]:
+        index.add(*dronescan.parse_mac_prefix(oui + ":A"))
+        index.add(*dronescan.parse_mac_prefix(oui + ":B1:2"))
+
+    macs = [rand_mac(rng, rng.choice(ouis) if rng.random() < 0.1 else None) for _ in range(args.macs)]
+    ints = [dronescan.mac_to_int(m) for m in macs]
+
+    t0 = time.perf_counter()
+    legacy_hits = sum(1 for m in macs if mac_to_oui(m) in legacy)
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    str_hits = sum(1 for m in macs if index.lookup(dronescan.mac_to_int(m)) is not None)
+    t_str = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    int_hits = sum(1 for m in ints if index.lookup(m) is not None)
+    t_int = time.perf_counter() - t0
+
+    if not legacy_hits == str_hits == int_hits:
+        sys.exit(f"[ERROR] hit counts differ: {legacy_hits} / {str_hits} / {int_hits}")
+    n = len(macs)
+    print(f"{n} lookups, {len(index)} prefixes ({legacy_hits} hits)")
+    print(f"  set[str] + mac_to_oui        {t_legacy / n * 1e9:8.0f} ns/lookup")
+    print(f"  MACPrefixIndex + mac_to_int  {t_str / n * 1e9:8.0f} ns/lookup")
+    print(f"  MACPrefixIndex (int input)   {t_int / n * 1e9:8.0f} ns/lookup")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Sustained insert throughput of the --sqlite sink under a simulated scan loop.
+
+  python bench/bench_sqlite.py
+  python bench/bench_sqlite.py --alerts 100,1000,10000 --cycles 50
+
+Each cycle hands the sink N alerts plus one device upsert per alert (drawn from a
+pool of 5*N BSSIDs), as handle_ap does, and flushes once. Reports the time the
+scan thread spends per cycle, the writer's sustained rows/s (wall time until the
+sink has drained), and a "last seen" lookup on the (bssid, time) index.
+"""
+import argparse
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent / "tools"))
+sys.path.insert(0, str(HERE))
+import dronescan  # noqa: E402
+import synth  # noqa: E402
+
+def run(n: int, cycles: int, seed: int) -> tuple[float, float, float]:
+    rng = random.Random(seed)
+    pool = [synth.rand_mac(rng, rng.choice(synth.DRONE_OUIS)) for _ in range(5 * n)]
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        # Generated up front so the timed part is only what the scan loop pays.
+        work = []
+        for c in range(cycles):
+            ts = (start + timedelta(seconds=2 * c)).isoformat(timespec="seconds").replace("+00:00", "Z")
+            batch = []
+            for bssid in rng.sample(pool, n):
+                p = synth.alert_payload(rng, bssid, ts)
+                batch.append((p, (bssid, p["ssid"], p["oui"], p["severity"], int(p["channel"]), int(p["power"]), ts, ts)))
+            work.append(batch)
+        sink = dronescan.SQLiteSink(path)
+        scan_times = []
+        t0 = time.perf_counter()
+        for batch in work:
+            t = time.perf_counter()
+            for p, device in batch:
+                sink.emit(p)
+                sink.device(device)
+            sink.flush()
+            scan_times.append(time.perf_counter() - t)
+        sink.close()
+        wall = time.perf_counter() - t0
+
+        db = sqlite3.connect(path)
+        probe = pool[:200]
+        t = time.perf_counter()
+        for bssid in probe:
+            db.execute("SELECT max(time) FROM alerts WHERE bssid = ?", (bssid,)).fetchone()
+        lookup = (time.perf_counter() - t) / len(probe)
+        db.close()
+    return statistics.median(scan_times), 2 * n * cycles / wall, lookup
+
+def main():
+    ap = argparse.ArgumentParser(description="SQLite sink benchmark")
+    ap.add_argument("--alerts", default="100,1000,10000", help="Comma-separated alerts per cycle")
+    ap.add_argument("--cycles", type=int, default=30)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    print(f"{'alerts/cycle':>12} {'scan ms/cycle':>14} {'writer rows/s':>14} {'last-seen us':>13}")
+    for n in (int(x) for x in args.alerts.split(",")):
+        scan, rate, lookup = run(n, args.cycles, args.seed)
+        print(f"{n:>12} {scan * 1e3:>14.2f} {rate:>14,.0f} {lookup * 1e6:>13.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark SSID classification: the per-label any(rx.search) loop vs SSIDMatcher.
+
+  python bench/bench_ssid_matcher.py
+  python bench/bench_ssid_matcher.py --sizes 10,100,1000,10000 --ssids 5000
+"""
+import argparse
+import random
+import re
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "tools"))
+import dronescan  # noqa: E402
+
+def synth_rules(n: int, rng: random.Random) -> dict[str, list[re.Pattern]]:
+    """n patterns shaped like rules/ssids.yml (vendor word + optional suffix), 10 per label."""
+    rules: dict[str, list[re.Pattern]] = {}
+    for i in range(n):
+        word = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+        shape = i % 4
+        if shape == 0:
+            pat = f"(?i){word}"
+        elif shape == 1:
+            pat = f"(?i){word}[-_]?\\d+"
+        elif shape == 2:
+            pat = f"(?i)^{word}_[A-Z]{{2,4}}"
+        else:
+            pat = f"(?i)(?:{word}|{word[::-1]})\\d?"
+        rules.setdefault(f"label{i // 10}", []).append(re.compile(pat, re.IGNORECASE))
+    return rules
+
+# Non-ASCII characters that re.IGNORECASE matches to ASCII letters (dotted/dotless I,
+# long s, Kelvin sign); casefold() treats some of them differently.
+UNICODE_CASE = {"i": "\u0130", "k": "\u212a", "s": "\u017f"}
+
+def synth_ssids(n: int, rules: dict[str, list[re.Pattern]], rng: random.Random) -> list[str]:
+    """
+    Mostly background SSIDs, ~5% built around a rule literal so some rows match;
+    a third of those spell it with UNICODE_CASE look-alikes or U+0131 for 'i'.
+    """
+    words = [rx.pattern.split(")", 1)[1].strip("^(?:") for rxs in rules.values() for rx in rxs]
+    out = []
+    for _ in range(n):
+        if rng.random() < 0.05:
+            word = rng.choice(words).split("[")[0].split("|")[0]
+            if rng.random() < 0.33:
+                word = "".join(rng.choice((UNICODE_CASE.get(c, c), "\u0131" if c == "i" else c.upper())) for c in word)
+            out.append(word + f"-{rng.randint(0, 999)}")
+        else:
+            out.append("".join(rng.choice(string.ascii_letters + string.digits + "-_ ") for _ in range(rng.randint(6, 24))))
+    return out
+
+def naive_match(rules: dict[str, list[re.Pattern]], essid: str) -> list[str]:
+    return [label for label, rxs in rules.items() if any(rx.search(essid) for rx in rxs)]
+
+def main():
+    ap = argparse.ArgumentParser(description="SSID matcher scaling benchmark")
+    ap.add_argument("--sizes", default="10,100,1000,10000", help="Comma-separated pattern counts")
+    ap.add_argument("--ssids", type=int, default=2000, help="ESSIDs classified per size (default: 2000)")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    print(f"{'patterns':>9} {'build ms':>9} {'naive us/ssid':>14} {'matcher us/ssid':>16} {'speedup':>8}")
+    for n in (int(x) for x in args.sizes.split(",")):
+        rng = random.Random(args.seed)
+        rules = synth_rules(n, rng)
+        ssids = synth_ssids(args.ssids, rules, rng)
+
+        t0 = time.perf_counter()
+        matcher = dronescan.SSIDMatcher(rules)
+        build = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        expected = [naive_match(rules, e) for e in ssids]
+        naive = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        got = [matcher.match(e) for e in ssids]
+        fast = time.perf_counter() - t0
+
+        if got != expected:
+            sys.exit(f"[ERROR] matcher disagrees with the naive loop at {n} patterns")
+        print(f"{n:>9} {build * 1e3:>9.1f} {naive / len(ssids) * 1e6:>14.1f} {fast / len(ssids) * 1e6:>16.1f} {naive / fast:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Hot-path benchmark suite: parse, classify, dedup and JSONL emission, separately
+and end-to-end, with results saved as JSON for comparison against a baseline.
+
+  python bench/suite.py
+  python bench/suite.py --rows 1000,10000,200000 --patterns 10,1000,10000 --out base.json
+  python bench/suite.py --baseline base.json --out new.json   # exit 1 on a regression
+
+Stages, each timed over --cycles passes of one synthetic airodump CSV:
+  parse     parse_airodump_csv() of the whole file
+  classify  Classifier.classify() of every row, uncached; rules/ssids.yml plus
+            synthetic patterns up to --patterns (bench_ssid_matcher.synth_rules)
+  ssid_cache  the default 4096-entry CachedSSIDMatcher (rules/ssids.yml) over the
+            ESSIDs of --churn of the rows per cycle, as the live loop sees them;
+            rows/s counts lookups, and the hit rate is reported
+  dedup     DedupTable.should_emit() for every row, clock advancing one interval per cycle
+  jsonl     JSONLSink: one alert per row, emitted and drained to disk
+  e2e       what one live cycle does: the CSV is rewritten with --churn of the rows
+            re-seen (untimed), then IncrementalCSVParser, classify, TrackTable,
+            dedup and JSONL emission of every alert
+
+Every case runs in a fresh interpreter so its peak RSS is its own. Reported:
+rows/s (median cycle), p50/p99 cycle time and peak RSS of the worker. The
+baseline gate uses rows/s, i.e. the median; p99 over a few cycles is mostly the
+slowest sample and is shown for information only.
+"""
+import argparse
+import json
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent / "tools"))
+sys.path.insert(0, str(HERE))
+import dronescan  # noqa: E402
+import synth  # noqa: E402
+from bench_ssid_matcher import synth_rules  # noqa: E402
+
+STAGES = ("parse", "classify", "ssid_cache", "dedup", "jsonl", "e2e")
+USES_PATTERNS = ("classify", "e2e")
+RESULTS_VERSION = 1
+
+def quantile(values: list[float], q: float) -> float:
+    """Nearest-rank quantile."""
+    s = sorted(values)
+    return s[min(len(s) - 1, max(0, round(q * len(s) + 0.5) - 1))]
+
+def peak_rss() -> int:
+    """Peak resident set size of this process in bytes."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+def csv_file(workdir: Path, rows: int, seed: int) -> Path:
+    """Synthetic CSV with `rows` APs (and a station per 10), generated once per suite run."""
+    path = workdir / f"aps-{rows}.csv"
+    if not path.exists():
+        rng = random.Random(seed)
+        stations = [f"{synth.rand_mac(rng)}, {synth.stamp(time.time())}, {synth.stamp(time.time())}, -60, 12, "
+                    f"(not associated) , " for _ in range(rows // 10)]
+        path.write_text(synth.csv_text(synth.ap_lines(rows, rng), stations), newline="")
+    return path
+
+def build_classifier(patterns: int, seed: int) -> dronescan.Classifier:
+    rules = dronescan.load_ssid_rules()
+    extra = max(0, patterns - sum(map(len, rules.values())))
+    rules.update(synth_rules(extra, random.Random(seed)) if extra else {})
+    # No memoization: the cache is its own stage, and here it would turn the
+    # pattern-count comparison into LRU hits (small files) or misses (large ones).
+    return dronescan.Classifier(dronescan.load_ouis(include_modules=False),
+                                dronescan.CachedSSIDMatcher(dronescan.SSIDMatcher(rules), maxsize=0))
+
+def alert(mac: int, essid: str, channel, power, severity, oui, labels, now_iso: str, csv_path: Path) -> dict:
+    """Same shape as handle_ap()'s payload."""
+    return {
+        "time": now_iso,
+        "severity": severity,
+        "event": None,
+        "bssid": dronescan.int_to_mac(mac),
+        "channel": "" if channel is None else str(channel),
+        "power": "" if power is None else str(power),
+        "ssid": essid or None,
+        "oui": oui,
+        "ssid_labels": list(labels) or None,
+        "clients": None,
+        "source": "dronescan(airodump-ng)",
+        "csv": str(csv_path),
+    }
+
+def churn(path: Path, lines: list[str], rng: random.Random, fraction: float, now: float):
+    """Rewrite `path` with `fraction` of the AP rows carrying a new Last time seen."""
+    seen = synth.stamp(now)
+    for i in rng.sample(range(len(lines)), int(len(lines) * fraction)):
+        lines[i] = lines[i][:40] + seen + lines[i][59:]
+    path.write_text(synth.csv_text(lines), newline="")
+
+# ---------------------------
+# Worker: one (stage, rows, patterns) case
+# ---------------------------
+def run_case(stage: str, path: Path, patterns: int, cycles: int, churn_ratio: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    now_iso = datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+    aps = dronescan.parse_airodump_csv(path)
+    aps = [r for r in aps if r["mac"] is not None]
+    rows = len(aps)
+    classifier = build_classifier(patterns, seed) if stage in USES_PATTERNS else None
+    out = path.parent / f"{stage}-{rows}-{patterns}.jsonl"
+    times = []
+    work = rows  # items per cycle behind rows/s
+    extra = {}
+
+    if stage == "parse":
+        def cycle(_):
+            dronescan.parse_airodump_csv(path)
+    elif stage == "classify":
+        def cycle(_):
+            for r in aps:
+                classifier.classify(r["mac"], r["essid"])
+    elif stage == "ssid_cache":
+        cache = dronescan.CachedSSIDMatcher(dronescan.SSIDMatcher(dronescan.load_ssid_rules()))
+        work = max(1, int(rows * churn_ratio))
+        batches = [[r["essid"] for r in rng.sample(aps, work)] for _ in range(cycles + 1)]
+
+        def cycle(i):
+            for essid in batches[i]:
+                cache.match(essid)
+    elif stage == "dedup":
+        dedup = dronescan.DedupTable(ttl=60)
+        keys = [("OUI_MATCH", r["mac"] >> 24, r["essid"]) for r in aps]
+
+        def cycle(i):
+            now = 1e9 + 5 * i  # one --write-interval per cycle: some keys expire along the way
+            for key in keys:
+                dedup.should_emit(key, now)
+    elif stage == "jsonl":
+        payloads = [alert(r["mac"], r["essid"], r["channel"], r["power"], "OUI_MATCH", None, (), now_iso, path)
+                    for r in aps]
+
+        def cycle(_):
+            sink = dronescan.JSONLSink(out)
+            for p in payloads:
+                sink.emit(p)
+            sink.close()
+    else:
+        live = path.parent / f"e2e-{rows}.csv"
+        lines = [line for line in path.read_text().split("\r\n") if line[:2] not in ("", "BS", "St")]
+        lines = lines[:rows]
+        parser = dronescan.IncrementalCSVParser()
+        tracks = dronescan.TrackTable()
+        dedup = dronescan.DedupTable(ttl=60)
+        sink = dronescan.JSONLSink(out)
+        churn(live, lines, rng, 1.0, time.time())
+
+        def cycle(i):
+            now = time.time()
+            changed, _ = parser.parse(live)
+            for r in changed:
+                mac = r["mac"]
+                if mac is None:
+                    continue
+                severity, oui, labels = classifier.classify(mac, r["essid"])
+                channel, power = dronescan._int_or_none(r["channel"]), dronescan._int_or_none(r["power"])
+                track, event = tracks.update(mac, r["essid"], channel, power, now)
+                track.severity = severity
+                if severity and (dedup.should_emit((severity, mac >> 24 if oui else 0, r["essid"]), now)
+                                 or event == tracks.APPEARED):
+                    sink.emit(alert(mac, r["essid"], channel, power, severity, oui, labels, now_iso, live))
+            sink.flush()
+
+    cycle(-1)  # warm-up: caches, timestamp memo, first full parse in e2e
+    if stage == "ssid_cache":
+        warm = cache.cache.hits, cache.cache.misses
+    for i in range(cycles):
+        if stage == "e2e":
+            churn(live, lines, rng, churn_ratio, time.time() + i + 1)
+        t0 = time.perf_counter()
+        cycle(i)
+        times.append(time.perf_counter() - t0)
+    if stage == "e2e":
+        sink.close()
+    if stage == "ssid_cache":
+        hits, misses = cache.cache.hits - warm[0], cache.cache.misses - warm[1]
+        extra["hit_rate"] = hits / max(1, hits + misses)
+    out.unlink(missing_ok=True)
+    return {
+        "stage": stage,
+        "rows": rows,
+        "patterns": patterns if stage in USES_PATTERNS else None,
+        "cycles": cycles,
+        "rows_per_s": work / statistics.median(times),
+        "p50_ms": quantile(times, 0.5) * 1e3,
+        "p99_ms": quantile(times, 0.99) * 1e3,
+        "peak_rss_mib": peak_rss() / 2**20,
+        **extra,
+    }
+
+# ---------------------------
+# Driver
+# ---------------------------
+def case_key(r: dict) -> str:
+    return f"{r['stage']}/{r['rows']}" + (f"/{r['patterns']}" if r["patterns"] is not None else "")
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results: list[dict], baseline: dict, threshold: float) -> int:
+    """Print the change against `baseline`; returns how many cases regressed by more than `threshold`."""
+    base = {case_key(r): r for r in baseline["results"]}
+    regressions = 0
+    print(f"\nvs baseline {baseline.get('commit') or '?'} ({baseline.get('time', '?')}):")
+    print(f"{'case':<24} {'rows/s':>9} {'p99':>9} {'rss':>9}")
+    for r in results:
+        b = base.get(case_key(r))
+        if b is None:
+            print(f"{case_key(r):<24} {'(new)':>9}")
+            continue
+        d_rate = r["rows_per_s"] / b["rows_per_s"] - 1
+        d_p99 = r["p99_ms"] / b["p99_ms"] - 1
+        d_rss = r["peak_rss_mib"] / b["peak_rss_mib"] - 1
+        worse = d_rate < -threshold
+        regressions += worse
+        print(f"{case_key(r):<24} {d_rate:>+9.1%} {d_p99:>+9.1%} {d_rss:>+9.1%}" + ("  REGRESSION" if worse else ""))
+    return regressions
+
+def main():
+    ap = argparse.ArgumentParser(description="Parse/classify/dedup/sink benchmark suite")
+    ap.add_argument("--rows", default="1000,10000,200000", help="Comma-separated AP row counts")
+    ap.add_argument("--patterns", default="10,10000", help="Comma-separated SSID pattern counts (classify, e2e)")
+    ap.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated subset of {','.join(STAGES)}")
+    ap.add_argument("--cycles", type=int, default=20, help="Timed cycles per case (default: 20)")
+    ap.add_argument("--churn", type=float, default=0.3, help="Share of rows re-seen per e2e cycle (default: 0.3)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out", type=Path, help="Write results as JSON to this file")
+    ap.add_argument("--baseline", type=Path, help="Compare against a JSON file written by --out")
+    ap.add_argument("--threshold", type=float, default=0.15,
+                    help="Drop in rows/s (median cycle) that counts as a regression (default: 0.15)")
+    ap.add_argument("--worker", nargs=4, metavar=("STAGE", "CSV", "PATTERNS", "JSON"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker:
+        stage, path, patterns, out = args.worker
+        result = run_case(stage, Path(path), int(patterns), args.cycles, args.churn, args.seed)
+        Path(out).write_text(json.dumps(result))
+        return
+
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        sys.exit(f"[ERROR] unknown stage(s): {', '.join(sorted(unknown))}")
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    rows_list = [int(x) for x in args.rows.split(",")]
+    pattern_list = [int(x) for x in args.patterns.split(",")]
+
+    results = []
+    print(f"{'case':<24} {'rows/s':>11} {'p50 ms':>9} {'p99 ms':>9} {'RSS MiB':>8}")
+    with tempfile.TemporaryDirectory(prefix="dronescan-bench-") as tmp:
+        workdir = Path(tmp)
+        for rows in rows_list:
+            path = csv_file(workdir, rows, args.seed)
+            for stage in stages:
+                for patterns in (pattern_list if stage in USES_PATTERNS else [0]):
+                    out = workdir / "result.json"
+                    subprocess.run([sys.executable, __file__, "--worker", stage, str(path), str(patterns), str(out),
+                                    "--cycles", str(args.cycles), "--churn", str(args.churn), "--seed", str(args.seed)],
+                                   check=True)
+                    r = json.loads(out.read_text())
+                    results.append(r)
+                    print(f"{case_key(r):<24} {r['rows_per_s']:>11,.0f} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+                          f"{r['peak_rss_mib']:>8.1f}"
+                          + (f"  hit rate {r['hit_rate']:.1%}" if "hit_rate" in r else ""), flush=True)
+
+    if args.out:
+        args.out.write_text(json.dumps({
+            "version": RESULTS_VERSION,
+            "time": datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k in ("rows", "patterns", "cycles", "churn", "seed")},
+            "results": results,
+        }, indent=1) + "\n")
+        print(f"\n[INFO] results written to {args.out}")
+    if baseline and compare(results, baseline, args.threshold):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
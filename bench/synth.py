@@ -0,0 +1,68 @@
+"""
+Synthetic airodump-ng CSV content for the benchmarks in this directory.
+
+Rows follow airodump's column layout; roughly `drone_ratio` of the APs use a
+drone OUI from data/oui_drones.csv and/or an SSID that rules/ssids.yml matches.
+"""
+import random
+import string
+import time
+
+AP_HEADER = ("BSSID, First time seen, Last time seen, channel, Speed, Privacy, Cipher, "
+             "Authentication, Power, # beacons, # IV, LAN IP, ID-length, ESSID, Key")
+STATION_HEADER = "Station MAC, First time seen, Last time seen, Power, # packets, BSSID, Probed ESSIDs"
+DRONE_OUIS = ["60:60:1F", "34:D2:62", "90:03:B7", "38:1D:14", "EC:5B:CD"]
+DRONE_SSIDS = ["DJI-{n:04X}", "Spark-{n:06x}", "TELLO-{n:06X}", "Bebop2-{n:03d}", "MAVIC_AIR-{n:04d}"]
+CHANNELS = [1, 6, 11, 36, 40, 44, 48, 149, 153, 157, 161]
+
+def rand_mac(rng: random.Random, oui: str | None = None) -> str:
+    octets = [f"{rng.randrange(256):02X}" for _ in range(6)]
+    if oui:
+        octets[:3] = oui.split(":")
+    return ":".join(octets)
+
+def stamp(ts: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+
+def ap_line(rng: random.Random, bssid: str, essid: str, channel: int, power: int, first: float, last: float) -> str:
+    return (f"{bssid}, {stamp(first)}, {stamp(last)}, {channel:2d},  54, WPA2, CCMP, PSK, {power:3d}, "
+            f"{rng.randint(1, 9999):8d}, {0:8d},   0.  0.  0.   0, {len(essid):3d}, {essid}, ")
+
+def background_ssid(rng: random.Random) -> str:
+    if rng.random() < 0.1:
+        return ""  # hidden
+    return "".join(rng.choice(string.ascii_letters + string.digits + "-_ ") for _ in range(rng.randint(4, 24))).strip()
+
+def ap_lines(n: int, rng: random.Random, now: float | None = None, drone_ratio: float = 0.01) -> list[str]:
+    now = time.time() if now is None else now
+    out = []
+    for _ in range(n):
+        if rng.random() < drone_ratio:
+            bssid = rand_mac(rng, rng.choice(DRONE_OUIS) if rng.random() < 0.7 else None)
+            essid = rng.choice(DRONE_SSIDS).format(n=rng.randrange(4096))
+        else:
+            bssid, essid = rand_mac(rng), background_ssid(rng)
+        first = now - rng.randint(0, 3600)
+        out.append(ap_line(rng, bssid, essid, rng.choice(CHANNELS), rng.randint(-95, -30), first, now - rng.randint(0, 5)))
+    return out
+
+def csv_text(aps: list[str], stations: list[str] = ()) -> str:
+    lines = ["", AP_HEADER, *aps, "", STATION_HEADER, *stations, "", ""]
+    return "\r\n".join(lines)
+
+def alert_payload(rng: random.Random, bssid: str, ts: str) -> dict:
+    """An AP alert shaped like the ones dronescan's main() emits."""
+    return {
+        "time": ts,
+        "severity": rng.choice(("OUI_MATCH", "SSID_MATCH", "DRONE_CONFIRMED")),
+        "event": rng.choice(("APPEARED", "UPDATED", None)),
+        "bssid": bssid,
+        "channel": str(rng.choice(CHANNELS)),
+        "power": str(rng.randint(-90, -30)),
+        "ssid": rng.choice(DRONE_SSIDS).format(n=rng.randrange(1 << 12)),
+        "oui": bssid[:8],
+        "ssid_labels": ["DJI Mavic"],
+        "clients": None,
+        "source": "dronescan(airodump-ng)",
+        "csv": "/tmp/dronescan_kduvhf63/scan-01.csv",
+    }
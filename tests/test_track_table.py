@@ -0,0 +1,22 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "tools"))
+import dronescan  # noqa: E402
+
+MAC = 0x60601F112233
+
+def events(powers, bucket_db=10):
+    tracks = dronescan.TrackTable(bucket_db=bucket_db)
+    return [tracks.update(MAC, "DJI-1234", 6, p, float(i))[1] for i, p in enumerate(powers)]
+
+def test_jitter_across_bucket_boundary_is_not_updated():
+    # -50 is the edge between the [-60, -50) and [-50, -40) buckets.
+    assert events([-51, -50, -49, -51, -50, -52, -48, -51] * 5)[1:] == [None] * 39
+
+def test_power_moving_half_a_bucket_past_the_edge_is_updated():
+    evs = events([-51, -49, -45, -44, -52, -56])
+    assert evs == ["APPEARED", None, "UPDATED", None, None, "UPDATED"]
+
+def test_one_db_buckets_need_a_two_db_swing_to_flip_back():
+    assert events([-50, -51, -50, -49], bucket_db=1) == ["APPEARED", "UPDATED", None, "UPDATED"]
@@ -10,32 +10,54 @@ Examples:
   sudo python tools/dronescan.py --iface wlan0mon --jsonl sightings.jsonl
   sudo python tools/dronescan.py --iface wlan0mon --include-modules --band bg
   sudo python tools/dronescan.py --iface wlan0mon --channels 1,6,11 --write-interval 2
+  python tools/dronescan.py query sightings.jsonl --label 'DJI*' --channel 149 --since 2026-10-13 --until 2026-10-14
+  python tools/dronescan.py convert sightings.bin sightings.jsonl
 
 Notes:
   - You must have a monitor-mode interface ready (e.g., airmon-ng start wlan0).
   - This tool spawns airodump-ng and watches the freshest CSV it generates.
-  - Cleanly terminates airodump-ng on Ctrl+C.
+  - Cleanly terminates airodump-ng on Ctrl+C or SIGTERM, flushing the output sinks.
 """
 
 import argparse
+import array
+import bisect
+import calendar
 import csv
+import ctypes
+import ctypes.util
+import fnmatch
+import glob
+import gzip
+import heapq
+import itertools
+import hashlib
+import io
 import json
 import os
+import queue
 import re
+import select
+import shutil
 import signal
+import sqlite3
+import struct
 import subprocess
 import sys
 import tempfile
+import threading
 import time
-from collections import defaultdict
-from datetime import datetime, timezone
+import tracemalloc
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
 try:
-    import yaml  # Optional; if missing, a tiny fallback parser is used.
-    HAVE_YAML = True
-except Exception:
-    HAVE_YAML = False
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse
 
 ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = ROOT / "data"
@@ -44,9 +66,87 @@ RULES_DIR = ROOT / "rules"
 # ---------------------------
 # Data loading
 # ---------------------------
-def load_ouis(include_modules: bool) -> set[str]:
-    """Load OUIs from CSVs; returns set of 'XX:XX:XX'."""
-    ouis = set()
+def parse_mac_prefix(text: str, bits: int | None = None) -> tuple[int, int] | None:
+    """
+    Parse an OUI / MA-M / MA-S assignment into (prefix value, prefix bits).
+
+    Accepts 'XX:XX:XX' (24-bit), 'XX:XX:XX:X' (28-bit), 'XX:XX:XX:XX:X' (36-bit),
+    with ':', '-' or '.' separators, an optional '/NN' suffix, or an explicit
+    `bits` (e.g. a full MAC such as 70:B3:D5:48:20:00 with bits=36).
+    Returns None for anything malformed.
+    """
+    text = (text or "").strip()
+    if "/" in text:
+        text, _, suffix = text.partition("/")
+        if bits is None:
+            try:
+                bits = int(suffix)
+            except ValueError:
+                return None
+    digits = re.sub(r"[:\-.\s]", "", text).upper()
+    if not digits or len(digits) > 12 or not all(c in "0123456789ABCDEF" for c in digits):
+        return None
+    if bits is None:
+        bits = 4 * len(digits)
+    if bits not in MACPrefixIndex.LENGTHS or 4 * len(digits) < bits:
+        return None
+    value = int(digits, 16) << (48 - 4 * len(digits))
+    return value >> (48 - bits), bits
+
+def format_mac_prefix(prefix: int, bits: int) -> str:
+    """'XX:XX:XX' for a plain OUI; 'XX:XX:XX:X/28' style for sub-allocations."""
+    nibbles = f"{prefix:0{bits // 4}X}"
+    text = ":".join(nibbles[i:i + 2] for i in range(0, len(nibbles), 2))
+    return text if bits == 24 else f"{text}/{bits}"
+
+class MACPrefixIndex:
+    """
+    Longest-prefix match of 48-bit MAC integers against IEEE MA-L (24-bit),
+    MA-M (28-bit) and MA-S (36-bit) assignments: at most three dict probes per
+    lookup, most specific first, so a sub-allocation inside an umbrella block
+    (e.g. 70:B3:D5) wins over the block itself.
+    """
+    LENGTHS = (36, 28, 24)
+
+    def __init__(self):
+        self._tables: dict[int, dict[int, str]] = {bits: {} for bits in self.LENGTHS}
+
+    def __len__(self) -> int:
+        return sum(len(t) for t in self._tables.values())
+
+    def __contains__(self, oui: str) -> bool:
+        parsed = parse_mac_prefix(oui)
+        return bool(parsed) and parsed[0] in self._tables[parsed[1]]
+
+    def add(self, prefix: int, bits: int, label: str | None = None):
+        self._tables[bits][prefix] = label or format_mac_prefix(prefix, bits)
+
+    def items(self):
+        """Yield (bits, prefix, label) for every assignment, most specific length first."""
+        for bits in self.LENGTHS:
+            for prefix, label in self._tables[bits].items():
+                yield bits, prefix, label
+
+    def lookup(self, mac: int) -> str | None:
+        """Label of the longest assignment covering `mac` (a 48-bit int), or None."""
+        t = self._tables
+        if t[36]:
+            hit = t[36].get(mac >> 12)
+            if hit:
+                return hit
+        if t[28]:
+            hit = t[28].get(mac >> 20)
+            if hit:
+                return hit
+        return t[24].get(mac >> 24)
+
+def load_ouis(include_modules: bool) -> MACPrefixIndex:
+    """
+    Load OUIs from CSVs into a MACPrefixIndex. The `oui` column may hold a 24-,
+    28- or 36-bit prefix; an optional `prefix_len` column gives the length
+    explicitly (e.g. a full MAC plus prefix_len=36).
+    """
+    ouis = MACPrefixIndex()
     sources = ["oui_drones.csv"]
     if include_modules:
         sources.append("oui_modules.csv")
@@ -57,10 +157,10 @@ def load_ouis(include_modules: bool) -> set[str]:
         with open(p, newline="", encoding="utf-8") as f:
             r = csv.DictReader(f)
             for row in r:
-                oui = (row.get("oui") or "").strip().upper().replace("-", ":")
-                parts = oui.split(":")
-                if len(parts) == 3 and all(len(x) == 2 for x in parts):
-                    ouis.add(":".join(parts))
+                bits = (row.get("prefix_len") or "").strip()
+                parsed = parse_mac_prefix(row.get("oui") or "", int(bits) if bits.isdigit() else None)
+                if parsed:
+                    ouis.add(*parsed)
     return ouis
 
 def fallback_parse_ssid_yaml(text: str) -> dict[str, list[str]]:
@@ -82,35 +182,297 @@ def fallback_parse_ssid_yaml(text: str) -> dict[str, list[str]]:
             out[label].append(val)
     return out
 
-def load_ssid_rules() -> dict[str, list[re.Pattern]]:
-    """Load SSID regex patterns from rules/ssids.yml; returns dict[label]->list[compiled regex]."""
+def import_yaml():
+    """
+    PyYAML, imported on first use so a warm rules cache never pays for it; None if
+    it is not installed (a tiny fallback parser is used instead).
+    """
+    try:
+        import yaml
+    except Exception:
+        return None
+    return yaml
+
+def load_ssid_patterns() -> dict[str, list[str]]:
+    """Read rules/ssids.yml; returns dict[label]->list[regex source] (not compiled)."""
     path = RULES_DIR / "ssids.yml"
-    rules = defaultdict(list)
     if not path.exists():
-        return dict(rules)
+        return {}
     text = path.read_text(encoding="utf-8", errors="ignore")
-    if HAVE_YAML:
+    yaml = import_yaml()
+    if yaml is not None:
         obj = yaml.safe_load(text) or {}
     else:
         obj = fallback_parse_ssid_yaml(text)
-    for label, patterns in (obj or {}).items():
-        if not patterns:
+    return {label: [str(p) for p in patterns] for label, patterns in (obj or {}).items() if patterns}
+
+def compile_ssid_rules(patterns: dict[str, list[str]],
+                       previous: dict[str, list[re.Pattern]] | None = None) -> dict[str, list[re.Pattern]]:
+    """
+    Compile label->pattern lists. Labels whose pattern list is identical to the
+    one in `previous` reuse its compiled regexes instead of recompiling.
+    """
+    rules = defaultdict(list)
+    for label, pats in patterns.items():
+        old = (previous or {}).get(label)
+        if old is not None and [rx.pattern for rx in old] == pats:
+            rules[label] = old
             continue
-        for pat in patterns:
+        for pat in pats:
             try:
                 rules[label].append(re.compile(pat, re.IGNORECASE))
             except re.error as e:
                 print(f"[WARN] Bad regex for '{label}': {pat} ({e})", file=sys.stderr)
     return dict(rules)
 
+def load_ssid_rules() -> dict[str, list[re.Pattern]]:
+    """Load SSID regex patterns from rules/ssids.yml; returns dict[label]->list[compiled regex]."""
+    return compile_ssid_rules(load_ssid_patterns())
+
+# ---------------------------
+# SSID matching
+# ---------------------------
+# re's IGNORECASE matches U+0130 (dotted I) and U+0131 (dotless i) to ASCII i/I, but
+# casefold() keeps U+0131 and turns U+0130 into "i" + U+0307; map both before folding.
+_PREFILTER_FOLD = {0x130: "i", 0x131: "i"}
+
+def _required_any(items) -> list[str] | None:
+    """
+    For a parsed (sub)pattern, a set of literals of which at least one must occur
+    in every match, or None. Candidates are runs of consecutive ASCII literals,
+    non-repeated groups, and alternations (one literal set per branch); the one
+    whose shortest literal is longest wins, as it prefilters best.
+    """
+    candidates: list[list[str]] = []
+    run: list[str] = []
+    for op, av in items:
+        if op is sre_parse.LITERAL and av < 128:
+            run.append(chr(av))
+            continue
+        if run:
+            candidates.append(["".join(run)])
+            run = []
+        if op is sre_parse.SUBPATTERN:
+            sub = _required_any(av[-1])
+            if sub:
+                candidates.append(sub)
+        elif op is sre_parse.BRANCH:
+            alts: list[str] = []
+            for branch in av[1]:
+                sub = _required_any(branch)
+                if not sub:
+                    alts = []
+                    break
+                alts.extend(sub)
+            if alts:
+                candidates.append(alts)
+    if run:
+        candidates.append(["".join(run)])
+    if not candidates:
+        return None
+    best = max(candidates, key=lambda c: (min(map(len, c)), -len(c)))
+    return sorted({lit.casefold() for lit in best})
+
+def required_literals(rx: re.Pattern) -> list[str] | None:
+    """
+    Literals of which at least one must occur (casefolded) in any string `rx`
+    matches, or None if no such set can be derived (the pattern is then always
+    evaluated).
+    """
+    try:
+        return _required_any(sre_parse.parse(rx.pattern, rx.flags))
+    except Exception:
+        return None
+
+class AhoCorasick:
+    """Multi-literal substring search: one pass over the text finds every keyword id."""
+    def __init__(self, words: list[str]):
+        goto: list[dict[str, int]] = [{}]
+        out: list[tuple[int, ...]] = [()]
+        for wid, word in enumerate(words):
+            node = 0
+            for ch in word:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                node = nxt
+            out[node] += (wid,)
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for node in queue:  # BFS; the list grows while we walk it
+            for ch, nxt in goto[node].items():
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] += out[fail[nxt]]
+                queue.append(nxt)
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def search(self, text: str) -> set[int]:
+        goto, fail, out = self._goto, self._fail, self._out
+        found: set[int] = set()
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+class SSIDMatcher:
+    """
+    All SSID rules compiled into one matcher that returns every matching label.
+
+    Each regex is reduced to the literal(s) it cannot match without; a single
+    Aho-Corasick pass over the casefolded ESSID selects the candidate regexes, and
+    only those (plus the few patterns without a usable literal) are evaluated.
+    Cost per ESSID is therefore roughly independent of the number of rules.
+    """
+    def __init__(self, rules: dict[str, list[re.Pattern]]):
+        self.labels = list(rules)
+        self.patterns: list[tuple[int, re.Pattern]] = []  # (label index, regex)
+        self._always: list[int] = []  # pattern ids without a required literal
+        literal_ids: dict[str, list[int]] = {}
+        for li, label in enumerate(self.labels):
+            for rx in rules[label]:
+                pid = len(self.patterns)
+                self.patterns.append((li, rx))
+                lits = required_literals(rx)
+                if lits is None:
+                    self._always.append(pid)
+                    continue
+                for lit in lits:
+                    literal_ids.setdefault(lit, []).append(pid)
+        self._literals = list(literal_ids)
+        self._literal_pids = [literal_ids[lit] for lit in self._literals]
+        self._ac = AhoCorasick(self._literals)
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def match(self, essid: str) -> list[str]:
+        """Labels (in rules order) with at least one pattern matching `essid`."""
+        pids = set(self._always)
+        for wid in self._ac.search(essid.translate(_PREFILTER_FOLD).casefold()):
+            pids.update(self._literal_pids[wid])
+        hit: set[int] = set()
+        patterns = self.patterns
+        for pid in sorted(pids):
+            li, rx = patterns[pid]
+            if li in hit:
+                continue
+            if rx.search(essid):
+                hit.add(li)
+        return [self.labels[li] for li in sorted(hit)]
+
+class LRUCache:
+    """Bounded mapping with least-recently-used eviction and hit/miss counters."""
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key, default=None):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._data.clear()
+
+class CachedSSIDMatcher:
+    """
+    Memoizes SSIDMatcher results per ESSID in a bounded LRU.
+
+    ESSIDs arrive stripped from the parser and are used as-is for the key (rules
+    may be case-sensitive, so no case folding). Swapping in a new matcher via
+    set_matcher() -- i.e. a rules reload -- drops every cached result.
+    """
+    def __init__(self, matcher: SSIDMatcher, maxsize: int = 4096):
+        self.matcher = matcher
+        self.cache = LRUCache(maxsize)
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self.matcher)
+
+    def set_matcher(self, matcher: SSIDMatcher):
+        self.matcher = matcher
+        self.cache.clear()
+        self.invalidations += 1
+
+    def match(self, essid: str) -> tuple[str, ...]:
+        labels = self.cache.get(essid)
+        if labels is None:
+            labels = tuple(self.matcher.match(essid))
+            self.cache.put(essid, labels)
+        return labels
+
+    def stats(self) -> str:
+        c = self.cache
+        return f"ssid_cache={len(c)}/{c.maxsize} hits={c.hits} misses={c.misses} evictions={c.evictions}"
+
 # ---------------------------
 # Helpers
 # ---------------------------
-def mac_to_oui(mac: str) -> str:
-    mac = (mac or "").strip().upper().replace("-", ":")
-    if len(mac) != 17 or mac.count(":") != 5:
-        return ""
-    return ":".join(mac.split(":")[:3])
+def mac_to_int(mac: str) -> int | None:
+    """'AA:BB:CC:DD:EE:FF' (or '-' separated) -> 48-bit int; None if malformed."""
+    if len(mac) != 17:
+        return None
+    try:
+        return int(mac.replace(":", "").replace("-", ""), 16)
+    except ValueError:
+        return None
+
+def int_to_mac(mac: int) -> str:
+    """48-bit int -> 'AA:BB:CC:DD:EE:FF' (only needed when building output)."""
+    h = f"{mac:012X}"
+    return f"{h[0:2]}:{h[2:4]}:{h[4:6]}:{h[6:8]}:{h[8:10]}:{h[10:12]}"
+
+_EPOCH_CACHE: dict[str, float | None] = {}
+
+def airodump_time_to_epoch(text: str) -> float | None:
+    """
+    airodump's 'YYYY-MM-DD HH:MM:SS' (local time) -> epoch seconds, None if blank
+    or malformed. Most rows in a cycle share a handful of values, so results are
+    memoized in a small table that is simply cleared when it fills up.
+    """
+    try:
+        return _EPOCH_CACHE[text]
+    except KeyError:
+        pass
+    try:
+        value = time.mktime(time.strptime(text, "%Y-%m-%d %H:%M:%S"))
+    except (TypeError, ValueError, OverflowError):
+        value = None
+    if len(_EPOCH_CACHE) >= 4096:
+        _EPOCH_CACHE.clear()
+    _EPOCH_CACHE[text] = value
+    return value
 
 def latest_csv(prefix: Path) -> Path | None:
     """
@@ -121,49 +483,2070 @@ def latest_csv(prefix: Path) -> Path | None:
     candidates = sorted(parent.glob(f"{stem}-*.csv"), key=lambda p: p.stat().st_mtime, reverse=True)
     return candidates[0] if candidates else None
 
-def parse_airodump_csv(path: Path) -> list[dict]:
+class CSVWatcher:
+    """
+    Tracks the active <prefix>-NN.csv without re-globbing every cycle.
+
+    The directory is only re-globbed when its mtime changes (i.e. a file was
+    created, renamed or removed), and `poll()` short-circuits when the active
+    file's (mtime_ns, size, inode) signature is the same as on the last call.
+    CSVs that already existed when the prefix was set (e.g. a previous run's) are
+    kept out of `produced`, the files this airodump generation wrote.
+    """
+    def __init__(self, prefix: Path):
+        self.retarget(prefix)
+
+    def retarget(self, prefix: Path):
+        """Follow a new --write prefix (e.g. after rotation); forgets the cached file."""
+        self.prefix = prefix
+        self.path: Path | None = None
+        self._dir_mtime_ns: int | None = None
+        self._sig: tuple[int, int, int] | None = None
+        self.preexisting = set(prefix.parent.glob(f"{prefix.name}-*.csv"))
+        self.produced: set[Path] = set()
+
+    @property
+    def size(self) -> int:
+        """Size in bytes of the active CSV as of the last poll."""
+        return self._sig[1] if self._sig else 0
+
+    @property
+    def mtime(self) -> float | None:
+        """Modification time (epoch seconds) of the active CSV as of the last poll."""
+        return self._sig[0] / 1e9 if self._sig else None
+
+    def current(self) -> Path | None:
+        """Return the newest CSV for the prefix, re-globbing only on directory changes."""
+        try:
+            dir_mtime_ns = self.prefix.parent.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if self.path is None or dir_mtime_ns != self._dir_mtime_ns:
+            self._dir_mtime_ns = dir_mtime_ns
+            path = latest_csv(self.prefix)
+            if path != self.path:
+                self.path = path
+                self._sig = None
+        return self.path
+
+    def poll(self) -> Path | None:
+        """Return the active CSV if it changed since the last poll, else None."""
+        path = self.current()
+        if path is None:
+            return None
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            # Raced with a removal; force a re-glob next time.
+            self.path = None
+            return None
+        sig = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if sig == self._sig:
+            return None
+        self._sig = sig
+        if path not in self.preexisting:
+            self.produced.add(path)
+        return path
+
+class PollWaiter:
+    """Fixed-interval wakeups (the portable fallback)."""
+    mode = "poll"
+
+    def __init__(self, prefix: Path, interval: float):
+        self.prefix = prefix
+        self.interval = interval
+
+    def wait(self, timeout: float | None = None) -> bool:
+        time.sleep(self.interval if timeout is None else min(self.interval, timeout))
+        return True
+
+    def close(self):
+        pass
+
+class InotifyWaiter:
+    """
+    Wakes when airodump-ng flushes a <prefix>-NN.csv (Linux inotify via ctypes).
+
+    airodump-ng rewrites the CSV in place and keeps it open, so IN_MODIFY is
+    watched alongside IN_CLOSE_WRITE/IN_MOVED_TO/IN_CREATE; a flush arrives as a
+    burst of writes, so events are drained until the directory has been quiet for
+    `settle` seconds before returning.
+    """
+    mode = "inotify"
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, prefix: Path, idle_timeout: float, settle: float = 0.05):
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name or not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._libc = libc
+        self.fd = fd
+        self.idle_timeout = idle_timeout
+        self.settle = settle
+        self._wd: int | None = None
+        self._dir: Path | None = None
+        self.prefix = prefix
+
+    @property
+    def prefix(self) -> Path:
+        return self._prefix
+
+    @prefix.setter
+    def prefix(self, prefix: Path):
+        self._prefix = prefix
+        self._pattern = f"{prefix.name}-*.csv"
+        if prefix.parent != self._dir:
+            if self._wd is not None:
+                self._libc.inotify_rm_watch(self.fd, self._wd)
+            mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(str(prefix.parent)), mask)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {prefix.parent}")
+            self._wd = wd
+            self._dir = prefix.parent
+
+    def _drain(self) -> bool:
+        """Consume pending events; True if any concerned our CSVs."""
+        hit = False
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return hit
+            off = 0
+            while off < len(buf):
+                _wd, _mask, _cookie, length = self._EVENT.unpack_from(buf, off)
+                off += self._EVENT.size
+                name = buf[off:off + length].rstrip(b"\0").decode("utf-8", "ignore")
+                off += length
+                if fnmatch.fnmatchcase(name, self._pattern):
+                    hit = True
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until a CSV flush settles or the timeout expires; True on a flush."""
+        deadline = time.monotonic() + (self.idle_timeout if timeout is None else min(timeout, self.idle_timeout))
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if ready and self._drain():
+                break
+        # Let the rest of the flush land before the caller reads the file.
+        while select.select([self.fd], [], [], self.settle)[0]:
+            self._drain()
+        return True
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+def make_waiter(mode: str, prefix: Path, interval: float):
+    """Build the loop's wakeup source: inotify where available, else fixed polling."""
+    if mode in ("auto", "inotify"):
+        try:
+            # The poll interval stays as a safety net in case an event is missed.
+            return InotifyWaiter(prefix, idle_timeout=max(interval * 5, 10))
+        except OSError as e:
+            if mode == "inotify":
+                raise
+            print(f"[WARN] inotify unavailable ({e}); falling back to polling", file=sys.stderr)
+    return PollWaiter(prefix, interval)
+
+def _ap_row(row: list[str]) -> dict | None:
+    """Map one decoded AP-table row to the dict shape used by the scan loop."""
+    # Airodump AP columns: BSSID, First time seen, Last time seen, channel, Speed, Privacy,
+    # Cipher, Authentication, Power, # beacons, # IV, LAN IP, ID-length, ESSID, Key
+    if len(row) < 14:
+        return None
+    bssid = (row[0] or "").strip().upper()
+    return {
+        "bssid": bssid,
+        "mac": mac_to_int(bssid),  # parsed once; state tables key on this int
+        "essid": (row[13] or "").strip(),
+        "channel": (row[3] or "").strip(),
+        "power": (row[8] or "").strip(),
+        "first_seen": (row[1] or "").strip(),
+        "last_seen": (row[2] or "").strip(),
+    }
+
+def _station_row(row: list[str]) -> dict | None:
+    """
+    Map one decoded station-table row; `probed` holds the Probed ESSIDs column(s).
+    `mac` / `assoc_mac` are the station and associated-BSSID addresses as ints.
+    """
+    # Airodump station columns: Station MAC, First time seen, Last time seen, Power,
+    # # packets, BSSID, Probed ESSIDs (comma-separated, so it spills into extra columns)
+    if len(row) < 6:
+        return None
+    station = (row[0] or "").strip().upper()
+    bssid = (row[5] or "").strip().upper()
+    if bssid.startswith("("):  # "(not associated)"
+        bssid = ""
+    return {
+        "station": station,
+        "mac": mac_to_int(station),
+        "bssid": bssid,
+        "assoc_mac": mac_to_int(bssid) if bssid else None,
+        "power": (row[3] or "").strip(),
+        "first_seen": (row[1] or "").strip(),
+        "last_seen": (row[2] or "").strip(),
+        "probed": [p for p in (x.strip() for x in row[6:]) if p],
+    }
+
+def parse_airodump_csv(path: Path, stations: list | None = None) -> list[dict]:
     """
     Parse the AP table from an airodump-ng CSV (first section).
-    Returns list of dicts: {bssid, essid, channel, power, first_seen, last_seen}
+    Returns list of dicts: {bssid, mac, essid, channel, power, first_seen, last_seen}
+    where `mac` is the BSSID as a 48-bit int (None if malformed).
+    If `stations` is a list, the station table (second section) is parsed in the
+    same pass and its rows are appended to it (see _station_row).
     """
     aps = []
     try:
         with open(path, newline="", encoding="utf-8", errors="ignore") as f:
             reader = csv.reader(f)
-            header_seen = False
+            section = None  # "ap" | "station"
             for row in reader:
                 if not row:
-                    # Blank line -> likely end of AP section
-                    if header_seen:
+                    # Blank line -> end of a section
+                    if section == "station" or (section == "ap" and stations is None):
                         break
                     continue
-                if row[0].strip().upper().startswith("BSSID"):
-                    header_seen = True
-                    continue
-                if not header_seen:
+                head = row[0].strip().upper()
+                if head.startswith("BSSID"):
+                    section = "ap"
                     continue
-                # Airodump AP columns: BSSID, First time seen, Last time seen, channel, Speed, Privacy,
-                # Cipher, Authentication, Power, # beacons, # IV, LAN IP, ID-length, ESSID, Key
-                if len(row) < 14:
+                if head.startswith("STATION MAC"):
+                    section = "station"
                     continue
-                bssid = (row[0] or "").strip().upper()
-                first_seen = (row[1] or "").strip()
-                last_seen = (row[2] or "").strip()
-                channel = (row[3] or "").strip()
-                power = (row[8] or "").strip()
-                essid = (row[13] or "").strip()
-                aps.append({
-                    "bssid": bssid,
-                    "essid": essid,
-                    "channel": channel,
-                    "power": power,
-                    "first_seen": first_seen,
-                    "last_seen": last_seen,
-                })
+                if section == "ap":
+                    ap_row = _ap_row(row)
+                    if ap_row:
+                        aps.append(ap_row)
+                elif section == "station" and stations is not None:
+                    st_row = _station_row(row)
+                    if st_row:
+                        stations.append(st_row)
     except FileNotFoundError:
         pass
     return aps
 
+class IncrementalCSVParser:
+    """
+    Stateful parser for the live loop, streaming both CSV sections in one pass.
+
+    airodump-ng rewrites the whole CSV in place every --write-interval, so it cannot
+    be tailed by byte offset. Instead we remember each BSSID's / station's raw line
+    from the previous pass and only CSV-decode the lines that are new or changed;
+    unchanged rows (same last_seen, power, ...) are not handed back to the caller.
+    Stations are also indexed by the BSSID they are associated with.
+    """
+    def __init__(self):
+        self._lines: dict[str, str] = {}     # BSSID (raw column text) -> raw line
+        self._st_lines: dict[str, str] = {}  # Station MAC (raw column text) -> raw line
+        self._st_bssid: dict[int, int] = {}  # station MAC -> associated BSSID
+        self.stations_by_bssid: dict[int, set[int]] = {}
+        self.rows_total = 0    # AP rows in the last pass
+        self.rows_changed = 0  # of which new or changed
+        self.stations_total = 0
+
+    def reset(self):
+        self._lines.clear()
+        self._st_lines.clear()
+        self._st_bssid.clear()
+        self.stations_by_bssid.clear()
+        self.rows_total = self.rows_changed = self.stations_total = 0
+
+    def _associate(self, mac: int | None, bssid: int | None):
+        old = self._st_bssid.get(mac)
+        if old == bssid:
+            return
+        if old is not None:
+            members = self.stations_by_bssid.get(old)
+            if members is not None:
+                members.discard(mac)
+                if not members:
+                    del self.stations_by_bssid[old]
+        if mac is None:
+            return
+        if bssid is not None:
+            self._st_bssid[mac] = bssid
+            self.stations_by_bssid.setdefault(bssid, set()).add(mac)
+        else:
+            self._st_bssid.pop(mac, None)
+
+    def parse(self, path: Path) -> tuple[list[dict], list[dict]]:
+        """Return the (AP rows, station rows) of `path` that differ from the previous call."""
+        ap_rows, stations = self.parse_raw(path)
+        aps = []
+        for row in ap_rows:
+            ap_row = _ap_row(row)
+            if ap_row:
+                aps.append(ap_row)
+        return aps, stations
+
+    def parse_raw(self, path: Path):
+        """
+        Like parse(), but the changed AP rows come back undecoded, as an iterator of
+        CSV field lists (for the columnar backend). Station rows are decoded as usual.
+        """
+        try:
+            with open(path, newline="", encoding="utf-8", errors="ignore") as f:
+                text = f.read()
+        except FileNotFoundError:
+            return iter(()), []
+        prev, prev_st = self._lines, self._st_lines
+        cur: dict[str, str] = {}
+        cur_st: dict[str, str] = {}
+        changed: list[str] = []
+        changed_st: list[str] = []
+        table = changed_table = prev_table = None
+        for line in text.split("\n"):
+            line = line.rstrip("\r")
+            if not line:
+                continue
+            key = line.split(",", 1)[0]
+            if len(key) != 17:  # not a MAC; maybe a section header
+                head = key.strip().upper()
+                if head.startswith("BSSID"):
+                    table, changed_table, prev_table = cur, changed, prev
+                    continue
+                if head.startswith("STATION MAC"):
+                    table, changed_table, prev_table = cur_st, changed_st, prev_st
+                    continue
+            if table is None:
+                continue
+            table[key] = line
+            if prev_table.get(key) != line:
+                changed_table.append(line)
+        # Rebuilding the tables drops rows that left the file (e.g. a fresh CSV).
+        self._lines, self._st_lines = cur, cur_st
+        for mac in prev_st.keys() - cur_st.keys():
+            self._associate(mac_to_int(mac.strip().upper()), None)
+        self.rows_total = len(cur)
+        self.rows_changed = len(changed)
+        self.stations_total = len(cur_st)
+        stations = []
+        for row in csv.reader(changed_st):
+            st_row = _station_row(row)
+            if st_row:
+                self._associate(st_row["mac"], st_row["assoc_mac"])
+                stations.append(st_row)
+        return csv.reader(changed), stations
+
+def format_alert(payload: dict) -> str:
+    """One-line console rendering of an alert payload."""
+    line = f"[{payload['time']}] {payload['severity']}"
+    if payload.get("event"):
+        line += f"/{payload['event']}"
+    if payload.get("motion"):
+        line += f"/{payload['motion']}"
+    line += f" BSSID={payload['bssid']}"
+    if payload.get("associated_bssid"):
+        line += f" ASSOC={payload['associated_bssid']}"
+    if payload.get("ssid"):
+        line += f" SSID='{payload['ssid']}'"
+    if payload.get("oui"):
+        line += f" OUI={payload['oui']}"
+    if payload.get("ssid_labels"):
+        line += " TAGS=" + ",".join(payload["ssid_labels"])
+    if payload.get("channel"):
+        line += f" CH={payload['channel']}"
+    if payload.get("power"):
+        line += f" PWR={payload['power']}"
+    return line
+
+# ---------------------------
+# Classification
+# ---------------------------
+# Indexed by (oui hit) | (ssid hit) << 1, which is also what the columnar path computes.
+SEVERITY_BY_CODE = (None, "OUI_MATCH", "SSID_MATCH", "DRONE_CONFIRMED")
+
+class Classifier:
+    """OUI + SSID-rule classification of one AP, shared by every scan backend."""
+    def __init__(self, ouis: MACPrefixIndex, ssids: CachedSSIDMatcher):
+        self.ouis = ouis
+        self.ssids = ssids
+        self._columnar: ColumnarOUIIndex | None = None
+
+    def swap(self, ouis: MACPrefixIndex, matcher: SSIDMatcher):
+        """Install reloaded rules; cached SSID results and the columnar OUI index are dropped."""
+        self.ouis = ouis
+        self._columnar = None
+        self.ssids.set_matcher(matcher)
+
+    def classify(self, mac: int, essid: str) -> tuple[str | None, str | None, tuple[str, ...]]:
+        """Return (severity, matched OUI label, SSID labels); severity None if no match."""
+        oui = self.ouis.lookup(mac)
+        labels = self.ssids.match(essid) if essid else ()
+        return SEVERITY_BY_CODE[(oui is not None) | (bool(labels) << 1)], oui, labels
+
+    def classify_columns(self, np, cols: "APColumns"):
+        """
+        Vectorized classify() over a columnar snapshot: returns (severity codes as an
+        int8 array, OUI label per row or None, SSID labels per row).
+        """
+        if self._columnar is None:
+            self._columnar = ColumnarOUIIndex(np, self.ouis)
+        oui_idx = self._columnar.lookup(cols.mac)
+        match = self.ssids.match
+        labels = [match(e) if e else () for e in cols.essid]
+        ssid_hit = np.fromiter(map(bool, labels), dtype=np.int8, count=len(labels))
+        codes = (oui_idx >= 0).astype(np.int8) | (ssid_hit << 1)
+        oui_labels = self._columnar.labels
+        ouis = [oui_labels[i] if i >= 0 else None for i in oui_idx.tolist()]
+        return codes, ouis, labels
+
+def load_numpy():
+    """NumPy for the optional --columnar backend; None when it is not installed."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+class APColumns:
+    """
+    One cycle's AP rows as parallel NumPy columns instead of a dict per row:
+    mac (uint64), channel/power (int16, NA when blank) and last_seen (epoch
+    seconds as int64, 0 when blank). ESSIDs stay a Python list.
+    """
+    __slots__ = ("mac", "channel", "power", "last_seen", "essid")
+    NA = -32768
+
+    def __init__(self, np, rows):
+        macs = array.array("Q")
+        channels = array.array("h")
+        powers = array.array("h")
+        seen = array.array("q")
+        essids: list[str] = []
+        for row in rows:
+            if len(row) < 14:
+                continue
+            mac = mac_to_int((row[0] or "").strip().upper())
+            if mac is None:
+                continue
+            macs.append(mac)
+            ch = _int_or_none(row[3])
+            channels.append(ch if ch is not None and self.NA < ch < 32768 else self.NA)
+            pw = _int_or_none(row[8])
+            powers.append(pw if pw is not None and self.NA < pw < 32768 else self.NA)
+            ts = airodump_time_to_epoch((row[2] or "").strip())
+            seen.append(int(ts) if ts else 0)
+            essids.append((row[13] or "").strip())
+        self.mac = np.frombuffer(macs, dtype=np.uint64) if macs else np.zeros(0, dtype=np.uint64)
+        self.channel = np.frombuffer(channels, dtype=np.int16) if channels else np.zeros(0, dtype=np.int16)
+        self.power = np.frombuffer(powers, dtype=np.int16) if powers else np.zeros(0, dtype=np.int16)
+        self.last_seen = np.frombuffer(seen, dtype=np.int64) if seen else np.zeros(0, dtype=np.int64)
+        self.essid = essids
+
+    def __len__(self) -> int:
+        return len(self.essid)
+
+class ColumnarOUIIndex:
+    """MACPrefixIndex as sorted uint64 key arrays, for longest-prefix match over a whole column."""
+    def __init__(self, np, index: MACPrefixIndex):
+        self.np = np
+        self.labels: list[str] = []
+        by_bits: dict[int, list[tuple[int, int]]] = {}
+        for bits, prefix, label in index.items():
+            by_bits.setdefault(bits, []).append((prefix, len(self.labels)))
+            self.labels.append(label)
+        self._tables = []
+        for bits in MACPrefixIndex.LENGTHS:  # most specific first
+            entries = sorted(by_bits.get(bits, ()))
+            if entries:
+                keys = np.array([p for p, _ in entries], dtype=np.uint64)
+                ids = np.array([i for _, i in entries], dtype=np.int32)
+                self._tables.append((np.uint64(48 - bits), keys, ids))
+
+    def lookup(self, macs):
+        """Label index (into self.labels) of the longest match per MAC, -1 where none."""
+        np = self.np
+        out = np.full(len(macs), -1, dtype=np.int32)
+        for shift, keys, ids in self._tables:
+            prefixes = macs >> shift
+            hit = np.isin(prefixes, keys) & (out < 0)
+            if hit.any():
+                out[hit] = ids[np.searchsorted(keys, prefixes[hit])]
+        return out
+
+# ---------------------------
+# Rule artifact cache
+# ---------------------------
+RULES_CACHE_VERSION = 2
+
+def default_rules_cache() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "dronescan" / "rules.json"
+
+def rules_cache_key(include_modules: bool) -> str:
+    """Content hash of every rule source, this script's source and the format/interpreter version."""
+    h = hashlib.sha256(f"{RULES_CACHE_VERSION}:{sys.version_info[:2]}:{include_modules}".encode())
+    h.update(Path(__file__).read_bytes())  # matcher internals changed -> rebuild, no manual bump needed
+    for p in rule_sources(include_modules):
+        h.update(p.name.encode() + b"\0")
+        try:
+            h.update(p.read_bytes())
+        except FileNotFoundError:
+            h.update(b"\0missing")
+        h.update(b"\0")
+    return h.hexdigest()
+
+# The artifact is plain JSON data (prefixes, pattern sources, prefilter tables) that
+# objects are rebuilt from, never unpickled: the scanner usually runs as root.
+def _freeze_rules(ouis: MACPrefixIndex, matcher: SSIDMatcher) -> dict:
+    ac = matcher._ac
+    return {
+        "ouis": [[bits, prefix, label] for bits, prefix, label in ouis.items()],
+        "labels": matcher.labels,
+        "patterns": [[li, rx.pattern, rx.flags] for li, rx in matcher.patterns],
+        "always": matcher._always,
+        "literals": matcher._literals,
+        "literal_pids": matcher._literal_pids,
+        "ac": {"goto": ac._goto, "fail": ac._fail, "out": ac._out},
+    }
+
+def _thaw_rules(artifact: dict) -> tuple[MACPrefixIndex, SSIDMatcher, dict[str, list[re.Pattern]]]:
+    ouis = MACPrefixIndex()
+    for bits, prefix, label in artifact["ouis"]:
+        ouis.add(prefix, bits, label)
+    ac = AhoCorasick.__new__(AhoCorasick)
+    ac._goto = artifact["ac"]["goto"]
+    ac._fail = artifact["ac"]["fail"]
+    ac._out = [tuple(ids) for ids in artifact["ac"]["out"]]
+    matcher = SSIDMatcher.__new__(SSIDMatcher)
+    matcher.labels = artifact["labels"]
+    matcher.patterns = [(li, re.compile(src, flags)) for li, src, flags in artifact["patterns"]]
+    matcher._always = artifact["always"]
+    matcher._literals = artifact["literals"]
+    matcher._literal_pids = artifact["literal_pids"]
+    matcher._ac = ac
+    rules: dict[str, list[re.Pattern]] = {label: [] for label in matcher.labels}
+    for li, rx in matcher.patterns:
+        rules[matcher.labels[li]].append(rx)
+    return ouis, matcher, rules
+
+def _cache_trusted(path: Path) -> bool:
+    """Only trust a cache file this user owns that nobody else can rewrite."""
+    st = path.stat()
+    return (not hasattr(os, "geteuid") or st.st_uid == os.geteuid()) and not st.st_mode & 0o022
+
+def load_rules(include_modules: bool, cache_path: Path | None):
+    """
+    Build (or load from the artifact cache) the OUI index and SSID matcher.
+
+    Returns (ouis, matcher, compiled rules, content key, cache hit); the key is
+    rules_cache_key() of the sources used, computed with or without a cache, so
+    RuleReloader starts from exactly what was loaded. On a hit the artifact is
+    read with a single read, the objects are rebuilt from it without re-deriving
+    literals or the prefilter, and PyYAML is never imported; on a miss the
+    sources are parsed and compiled, and the artifact is rewritten atomically.
+    """
+    key = rules_cache_key(include_modules)
+    if cache_path:
+        try:
+            if not _cache_trusted(cache_path):
+                print(f"[WARN] ignoring rules cache {cache_path}: not owned by this user or writable by others",
+                      file=sys.stderr)
+            else:
+                artifact = json.loads(cache_path.read_bytes())
+                if artifact.get("key") == key:
+                    return (*_thaw_rules(artifact), key, True)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[WARN] ignoring unreadable rules cache {cache_path}: {e}", file=sys.stderr)
+    ouis = load_ouis(include_modules)
+    rules = load_ssid_rules()
+    matcher = SSIDMatcher(rules)
+    if cache_path:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache_path.with_name(cache_path.name + f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({"key": key, **_freeze_rules(ouis, matcher)}, separators=(",", ":")))
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, cache_path)
+        except OSError as e:
+            print(f"[WARN] could not write rules cache {cache_path}: {e}", file=sys.stderr)
+    return ouis, matcher, rules, key, False
+
+# ---------------------------
+# Rule reload
+# ---------------------------
+def rule_sources(include_modules: bool) -> list[Path]:
+    """Files the OUI index and SSID rules are built from."""
+    paths = [RULES_DIR / "ssids.yml", DATA_DIR / "oui_drones.csv"]
+    if include_modules:
+        paths.append(DATA_DIR / "oui_modules.csv")
+    return paths
+
+class RuleReloader:
+    """
+    Live reload of rules/ssids.yml and data/*.csv without touching airodump-ng.
+
+    check() (called once per loop iteration) stats the source files and starts a
+    rebuild on a background thread when one changed or a SIGHUP set `requested`.
+    Labels whose pattern list is unchanged keep their compiled regexes. The main
+    loop collects the finished rule set with take() between cycles and swaps it
+    in, so a cycle never sees half-old, half-new rules; a broken edit is reported
+    and the running rules are kept. `key` is the rules_cache_key() of the live
+    rules: a rebuild whose sources hash the same (a touch, a reverted edit, a
+    SIGHUP with nothing changed) is dropped before anything is compiled.
+    """
+    def __init__(self, include_modules: bool, rules: dict[str, list[re.Pattern]], key: str | None = None):
+        self.include_modules = include_modules
+        self.paths = rule_sources(include_modules)
+        self.rules = rules  # compiled rules currently live
+        self.key = key
+        self.requested = False
+        self.reloads = 0
+        self._sig = self._signature()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._ready: tuple | None = None
+        self._ready_key: str | None = None
+
+    def _signature(self) -> tuple:
+        sig = []
+        for p in self.paths:
+            try:
+                st = p.stat()
+                sig.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                sig.append(None)
+        return tuple(sig)
+
+    def check(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        sig = self._signature()
+        if sig == self._sig and not self.requested:
+            return
+        self.requested = False
+        self._sig = sig
+        self._thread = threading.Thread(target=self._build, name="dronescan-reload", daemon=True)
+        self._thread.start()
+
+    def _build(self):
+        try:
+            key = rules_cache_key(self.include_modules)
+            if key == self.key:
+                return
+            ouis = load_ouis(self.include_modules)
+            rules = compile_ssid_rules(load_ssid_patterns(), previous=self.rules)
+            matcher = SSIDMatcher(rules)
+        except Exception as e:
+            print(f"[WARN] rule reload failed, keeping current rules: {e}", file=sys.stderr)
+            return
+        recompiled = [label for label, rxs in rules.items() if rxs is not self.rules.get(label)]
+        with self._lock:
+            self._ready = (ouis, rules, matcher, recompiled)
+            self._ready_key = key
+
+    def take(self) -> tuple | None:
+        """(ouis, rules, matcher, recompiled labels) from a finished rebuild, else None."""
+        with self._lock:
+            ready, self._ready = self._ready, None
+            key = self._ready_key
+        if ready:
+            self.rules = ready[1]
+            self.key = key
+            self.reloads += 1
+        return ready
+
+# ---------------------------
+# Scanner state
+# ---------------------------
+class DedupTable:
+    """
+    Alert de-duplication with TTL expiry and a hard entry cap.
+
+    A key is suppressed for `ttl` seconds after it was last emitted. Expiry is
+    driven by a heap ordered on emit time, so each call only touches entries that
+    are actually due; once `max_entries` is exceeded the oldest entry is evicted
+    early (it may then re-alert sooner than `ttl`).
+    """
+    def __init__(self, ttl: float, max_entries: int = 0):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._stamps: dict[tuple, float] = {}
+        self._heap: list[tuple[float, int, tuple]] = []
+        self._seq = itertools.count()
+        self.suppressed = self.expired = self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._stamps)
+
+    def _pop_oldest(self) -> bool:
+        """Drop the oldest heap entry; True if it was the key's live stamp."""
+        ts, _, key = heapq.heappop(self._heap)
+        if self._stamps.get(key) == ts:
+            del self._stamps[key]
+            return True
+        return False
+
+    def expire(self, now: float):
+        heap = self._heap
+        while heap and heap[0][0] + self.ttl <= now:
+            if self._pop_oldest():
+                self.expired += 1
+
+    def should_emit(self, key: tuple, now: float) -> bool:
+        self.expire(now)
+        prev = self._stamps.get(key)
+        if prev is not None and now - prev < self.ttl:
+            self.suppressed += 1
+            return False
+        self._stamps[key] = now
+        heapq.heappush(self._heap, (now, next(self._seq), key))
+        if self.max_entries:
+            while len(self._stamps) > self.max_entries:
+                if self._pop_oldest():
+                    self.evicted += 1
+        return True
+
+    def stats(self) -> str:
+        cap = self.max_entries or "inf"
+        return (f"dedup={len(self)}/{cap} suppressed={self.suppressed} "
+                f"expired={self.expired} evicted={self.evicted}")
+
+def _int_or_none(text: str) -> int | None:
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        return None
+
+class Track:
+    """
+    One tracked BSSID. Fixed-size per device: channel history and RSSI samples
+    live in small preallocated arrays used as ring buffers.
+    """
+    __slots__ = ("mac", "essid", "channel", "power", "first_seen", "last_seen", "severity", "motion",
+                 "bucket", "sched", "_channels", "_ch_n", "_rssi", "_rssi_pos", "_rssi_n")
+    CHANNEL_HISTORY = 8
+
+    def __init__(self, mac: int, now: float, rssi_window: int):
+        self.mac = mac
+        self.essid = ""
+        self.channel: int | None = None
+        self.power: int | None = None
+        self.first_seen = self.last_seen = now
+        self.severity: str | None = None  # last classification, None if not a drone
+        self.motion: str | None = None    # APPROACHING / DEPARTING once a trend is seen
+        self.bucket: int | None = None    # power bucket, for UPDATED events
+        self.sched = -1                   # id of this track's live entry in the GONE heap
+        self._channels = array.array("h", bytes(2 * self.CHANNEL_HISTORY))
+        self._ch_n = 0
+        self._rssi = array.array("b", bytes(rssi_window))
+        self._rssi_pos = 0
+        self._rssi_n = 0
+
+    def add_channel(self, channel: int):
+        """Record a channel change (consecutive repeats are not stored)."""
+        self.channel = channel
+        if self._ch_n and self._channels[(self._ch_n - 1) % self.CHANNEL_HISTORY] == channel:
+            return
+        self._channels[self._ch_n % self.CHANNEL_HISTORY] = channel
+        self._ch_n += 1
+
+    def channels(self) -> list[int]:
+        """Distinct-in-a-row channel history, oldest first."""
+        n, size = self._ch_n, self.CHANNEL_HISTORY
+        return [self._channels[i % size] for i in range(max(0, n - size), n)]
+
+    def add_rssi(self, dbm: int):
+        buf = self._rssi
+        buf[self._rssi_pos] = max(-128, min(127, dbm))
+        self._rssi_pos = (self._rssi_pos + 1) % len(buf)
+        self._rssi_n = min(self._rssi_n + 1, len(buf))
+
+    def rssi(self) -> list[int]:
+        """RSSI samples in the window, oldest first."""
+        buf, n = self._rssi, self._rssi_n
+        start = (self._rssi_pos - n) % len(buf)
+        return [buf[(start + i) % len(buf)] for i in range(n)]
+
+    def rssi_trend(self) -> float | None:
+        """Mean of the newer half of a full window minus the older half (dB), else None."""
+        if self._rssi_n < len(self._rssi) or len(self._rssi) < 2:
+            return None
+        samples = self.rssi()
+        half = len(samples) // 2
+        return sum(samples[-half:]) / half - sum(samples[:half]) / half
+
+class TrackTable:
+    """
+    Persistent per-BSSID track store, updated in place from each cycle's changed
+    rows, doubling as the snapshot diff engine.
+
+    update() reports APPEARED for a new track and UPDATED when the channel, ESSID
+    or power bucket changed (with half a bucket of hysteresis). Tracks not refreshed for `gone_secs` are retired by
+    expire() as GONE; that is driven by a deadline heap holding one live entry per
+    track, so only due tracks are visited. Bounded by `max_tracks`: the least
+    recently seen track is dropped first (without a GONE event).
+    """
+    APPEARED = "APPEARED"
+    UPDATED = "UPDATED"
+    GONE = "GONE"
+
+    def __init__(self, rssi_window: int = 8, max_tracks: int = 0, gone_secs: float = 0, bucket_db: int = 10):
+        self.rssi_window = rssi_window
+        self.max_tracks = max_tracks
+        self.gone_secs = gone_secs
+        self.bucket_db = max(1, bucket_db)
+        self._tracks: OrderedDict[int, Track] = OrderedDict()
+        self._heap: list[tuple[float, int, int]] = []  # (deadline, sched id, mac)
+        self._seq = itertools.count()
+        self.evicted = 0
+        self.gone = 0
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+    def get(self, mac: int) -> Track | None:
+        return self._tracks.get(mac)
+
+    def _schedule(self, track: Track, deadline: float):
+        track.sched = next(self._seq)
+        heapq.heappush(self._heap, (deadline, track.sched, track.mac))
+
+    def update(self, mac: int, essid: str, channel: int | None, power: int | None,
+               now: float) -> tuple[Track, str | None]:
+        """Fold one AP sighting into its track; returns (track, APPEARED/UPDATED/None)."""
+        tracks = self._tracks
+        track = tracks.get(mac)
+        event = None
+        if track is None:
+            event = self.APPEARED
+            track = tracks[mac] = Track(mac, now, self.rssi_window)
+            if self.gone_secs:
+                self._schedule(track, now + self.gone_secs)
+            if self.max_tracks and len(tracks) > self.max_tracks:
+                tracks.popitem(last=False)
+                self.evicted += 1
+        else:
+            tracks.move_to_end(mac)
+            track.last_seen = now
+            if essid != track.essid:
+                event = self.UPDATED
+        track.essid = essid
+        if channel is not None and channel > 0:
+            if track.channel is not None and channel != track.channel:
+                event = event or self.UPDATED
+            track.add_channel(channel)
+        if power is not None and -128 <= power < -1:  # airodump uses -1 for "unknown"
+            track.power = power
+            if track.bucket is None:
+                track.bucket = power // self.bucket_db
+            else:
+                # Hysteresis: leave the current bucket only once power is half a bucket
+                # past its edge, so RSSI jitter across a boundary is not an UPDATED per cycle.
+                low = track.bucket * self.bucket_db
+                margin = self.bucket_db / 2
+                if power < low - margin or power >= low + self.bucket_db + margin:
+                    event = event or self.UPDATED
+                    track.bucket = power // self.bucket_db
+            track.add_rssi(power)
+        return track, event
+
+    def next_deadline(self) -> float | None:
+        """Earliest time expire() could retire a track (may be a stale heap entry)."""
+        return self._heap[0][0] if self._heap else None
+
+    def expire(self, now: float) -> list[Track]:
+        """Remove and return tracks not refreshed within gone_secs."""
+        heap, tracks = self._heap, self._tracks
+        gone = []
+        while heap and heap[0][0] <= now:
+            _, sched, mac = heapq.heappop(heap)
+            track = tracks.get(mac)
+            if track is None or track.sched != sched:
+                continue  # evicted or superseded entry
+            due = track.last_seen + self.gone_secs
+            if due > now:
+                self._schedule(track, due)  # refreshed since it was queued
+                continue
+            del tracks[mac]
+            gone.append(track)
+        self.gone += len(gone)
+        return gone
+
+    def stats(self) -> str:
+        cap = self.max_tracks or "inf"
+        return f"tracks={len(self)}/{cap} tracks_evicted={self.evicted} gone={self.gone}"
+
+# ---------------------------
+# Metrics
+# ---------------------------
+class Histogram:
+    """Fixed-bucket latency histogram (seconds), safe to observe from any thread."""
+    BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets: tuple = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> tuple[list[int], float, int]:
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+    def quantile(self, q: float) -> float | None:
+        """Estimated q-quantile, interpolated within its bucket like Prometheus' histogram_quantile()."""
+        counts, _, count = self.snapshot()
+        if not count:
+            return None
+        rank, cum = q * count, 0
+        for i, n in enumerate(counts[:-1]):
+            if n and cum + n >= rank:
+                lo = self.buckets[i - 1] if i else 0.0
+                return lo + (self.buckets[i] - lo) * (rank - cum) / n
+            cum += n
+        return self.buckets[-1]  # in the +Inf bucket
+
+def _prom_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in labels.items()) + "}"
+
+class Metrics:
+    """
+    Registry rendered in the Prometheus text format.
+
+    Counters bumped by the loop live in `counts` (inc()); values the scanner
+    already keeps (table sizes, sink counters, ...) are registered as callables
+    and read at scrape time; histograms are created on first use per label set.
+    """
+    def __init__(self):
+        self._meta: dict[str, tuple[str, str]] = {}  # name -> (type, help), in registration order
+        self._fns: dict[str, object] = {}
+        self.counts: dict[tuple, float] = defaultdict(int)
+        self._hists: dict[str, dict[tuple, Histogram]] = {}
+
+    def counter(self, name: str, help: str, fn=None):
+        self._meta[name] = ("counter", help)
+        if fn:
+            self._fns[name] = fn
+
+    def gauge(self, name: str, help: str, fn):
+        self._meta[name] = ("gauge", help)
+        self._fns[name] = fn
+
+    def inc(self, name: str, n: float = 1, **labels):
+        self.counts[(name, tuple(labels.items()))] += n
+
+    def histogram(self, name: str, help: str = "", hist: Histogram | None = None, **labels) -> Histogram:
+        """The histogram for this label set (created, or `hist` registered, on first use)."""
+        if name not in self._meta:
+            self._meta[name] = ("histogram", help)
+            self._hists[name] = {}
+        key = tuple(labels.items())
+        h = self._hists[name].get(key)
+        if h is None:
+            h = self._hists[name][key] = hist or Histogram()
+        return h
+
+    def render(self) -> str:
+        lines = []
+        counts = list(self.counts.items())
+        for name, (kind, help) in list(self._meta.items()):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "histogram":
+                for key, h in list(self._hists[name].items()):
+                    buckets, total, n = h.snapshot()
+                    cum = 0
+                    for le, c in zip((*h.buckets, "+Inf"), buckets):
+                        cum += c
+                        lines.append(f"{name}_bucket{_prom_labels({**dict(key), 'le': le})} {cum}")
+                    lines.append(f"{name}_sum{_prom_labels(dict(key))} {total}")
+                    lines.append(f"{name}_count{_prom_labels(dict(key))} {n}")
+                continue
+            fn = self._fns.get(name)
+            if fn is not None:
+                value = fn()
+                samples = value if isinstance(value, list) else [({}, value)]
+            else:
+                samples = [(dict(key), v) for (n, key), v in counts if n == name]
+            for labels, v in samples:
+                lines.append(f"{name}{_prom_labels(labels)} {v}")
+        return "\n".join(lines) + "\n"
+
+class DetectionLatency:
+    """
+    Per-alert delay from a sighting to its alert, split into hops: seen_to_write
+    (airodump: last_seen to the CSV's mtime), write_to_parse (our wake-up after the
+    rewrite), parse_to_emit (parse, classify, dedup) and total. last_seen has 1 s
+    resolution, so seen_to_write and total include up to 1 s of truncation.
+    """
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 30.0, 60.0)
+    HOPS = ("seen_to_write", "write_to_parse", "parse_to_emit", "total")
+
+    def __init__(self, metrics: Metrics):
+        self.hists = {hop: metrics.histogram("dronescan_detection_latency_seconds",
+                                             "Sighting-to-alert delay per hop (see DetectionLatency)",
+                                             hist=Histogram(self.BUCKETS), hop=hop)
+                      for hop in self.HOPS}
+
+    def observe(self, last_seen: float | None, mtime: float | None, parsed: float, emitted: float) -> dict:
+        """Record one alert; returns {hop: seconds} (hops without a timestamp are left out)."""
+        hops = {
+            "seen_to_write": None if last_seen is None or mtime is None else mtime - last_seen,
+            "write_to_parse": None if mtime is None else parsed - mtime,
+            "parse_to_emit": emitted - parsed,
+            "total": None if last_seen is None else emitted - last_seen,
+        }
+        out = {}
+        for hop, value in hops.items():
+            if value is not None:
+                out[hop] = value = round(max(0.0, value), 3)  # clamp clock skew
+                self.hists[hop].observe(value)
+        return out
+
+    def stats(self) -> str:
+        parts = []
+        for hop in self.HOPS:
+            p50, p99 = self.hists[hop].quantile(0.5), self.hists[hop].quantile(0.99)
+            if p50 is not None:
+                parts.append(f"{hop}={p50:.3f}/{p99:.3f}s")
+        return "latency(p50/p99) " + " ".join(parts) if parts else "latency=n/a"
+
+def serve_metrics(metrics: Metrics, addr: str, port: int) -> ThreadingHTTPServer:
+    """Serve GET /metrics from a daemon thread."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((addr, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+# ---------------------------
+# Profiling
+# ---------------------------
+class CycleProfiler:
+    """
+    On-demand profiling of the main loop (--profile N).
+
+    SIGUSR1 runs cProfile over the next N cycles that scanned a CSV; SIGUSR2
+    starts tracemalloc and, N cycles later, writes the top allocation sites and
+    their growth since the signal. Reports land in `out_dir`. The handlers only
+    set flags that the loop checks at begin()/end(), so nothing is traced until
+    asked for.
+    """
+    TOP = 40
+
+    def __init__(self, out_dir: Path, cycles: int):
+        self.out_dir = Path(out_dir).expanduser()
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.cycles = max(1, cycles)
+        self.cpu_requested = False
+        self.mem_requested = False
+        self._prof = None
+        self._cpu_left = 0
+        self._mem_base: tracemalloc.Snapshot | None = None
+        self._mem_left = 0
+        self._mem_started = False
+
+    def begin(self):
+        if self.cpu_requested and self._prof is None:
+            import cProfile
+            self.cpu_requested = False
+            self._prof = cProfile.Profile()
+            self._cpu_left = self.cycles
+        if self.mem_requested and self._mem_base is None:
+            self.mem_requested = False
+            self._mem_started = not tracemalloc.is_tracing()
+            if self._mem_started:
+                tracemalloc.start(10)
+            self._mem_base = tracemalloc.take_snapshot()
+            self._mem_left = self.cycles
+        if self._prof is not None:
+            self._prof.enable()
+
+    def end(self, scanned: bool) -> list[Path]:
+        """Close out one loop iteration; returns the report files written, if any."""
+        written = []
+        if self._prof is not None:
+            self._prof.disable()
+            self._cpu_left -= scanned
+            if self._cpu_left <= 0:
+                written += self._dump_cpu()
+        if self._mem_base is not None:
+            self._mem_left -= scanned
+            if self._mem_left <= 0:
+                written.append(self._dump_mem())
+        return written
+
+    def _stamp(self) -> str:
+        return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    def _dump_cpu(self) -> list[Path]:
+        import pstats
+        prof, self._prof = self._prof, None
+        base = self.out_dir / f"profile-{self._stamp()}"
+        raw = base.with_suffix(".pstats")
+        prof.dump_stats(raw)
+        text = io.StringIO()
+        text.write(f"cProfile over {self.cycles} cycle(s); full data: {raw.name} (python -m pstats)\n\n")
+        stats = pstats.Stats(prof, stream=text)
+        stats.sort_stats("cumulative").print_stats(self.TOP)
+        stats.sort_stats("tottime").print_stats(self.TOP)
+        txt = base.with_suffix(".txt")
+        txt.write_text(text.getvalue())
+        return [txt, raw]
+
+    def _dump_mem(self) -> Path:
+        base, self._mem_base = self._mem_base, None
+        snap = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+
+        # Drop tracemalloc's own and import-machinery sites after grouping:
+        # Snapshot.filter_traces() is pure Python per trace and takes seconds.
+        def top(stats):
+            keep = (st for st in stats if not st.traceback[0].filename.startswith(("<frozen importlib", tracemalloc.__file__)))
+            return [str(st) for st in itertools.islice(keep, self.TOP)]
+
+        lines = [f"tracemalloc after {self.cycles} cycle(s): current {current / 2**20:.1f} MiB, "
+                 f"peak {peak / 2**20:.1f} MiB", "", f"Top {self.TOP} allocation sites:"]
+        lines += top(snap.statistics("lineno"))
+        lines += ["", f"Top {self.TOP} changes since the signal:"]
+        lines += top(snap.compare_to(base, "lineno"))
+        if self._mem_started:
+            tracemalloc.stop()
+        path = self.out_dir / f"tracemalloc-{self._stamp()}.txt"
+        path.write_text("\n".join(lines) + "\n")
+        return path
+
+# ---------------------------
+# Output sinks
+# ---------------------------
+class BatchSink:
+    """
+    Base for sinks written from a background thread.
+
+    emit() only appends to a list on the scan thread; flush() (once per loop
+    iteration) hands that list to the writer as one batch. The writer takes every
+    batch queued by then, optionally waits `flush_ms` for more, and commits them
+    together with _commit() (group commit), so a burst of alerts costs the
+    detection loop one list append per record.
+    """
+    def __init__(self, flush_ms: int = 0, name: str = "sink"):
+        self.name = name
+        self.flush_secs = max(0, flush_ms) / 1000
+        self.commits = 0
+        self.written = 0
+        self.errors = 0
+        self.commit_time = Histogram()
+        self._pending: list = []
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def emit(self, item):
+        self._pending.append(item)
+
+    def device(self, row: tuple):
+        """Per-device state update; only sinks that keep a device table use it."""
+
+    def flush(self):
+        """Hand this cycle's records to the writer (does not wait for them)."""
+        if self._pending:
+            self._queue.put(self._pending)
+            self._pending = []
+
+    def close(self):
+        """Flush, let the writer drain the queue, and release the sink."""
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self) -> str:
+        return (f"{self.name}: written={self.written} commits={self.commits} "
+                f"queued={self._queue.qsize()} errors={self.errors}")
+
+    def _take(self, items: list, timeout: float | None) -> bool:
+        """Add queued batches to `items`; False once the close sentinel is seen."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                if deadline is None:
+                    batch = self._queue.get_nowait()
+                else:
+                    batch = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                return True
+            if batch is None:
+                return False
+            items.extend(batch)
+
+    def _run(self):
+        running = True
+        while running:
+            batch = self._queue.get()
+            if batch is None:
+                break
+            items = list(batch)
+            if self.flush_secs:
+                running = self._take(items, self.flush_secs)
+            running = self._take(items, None) and running
+            t0 = time.perf_counter()
+            try:
+                self._commit(items)
+                self.commit_time.observe(time.perf_counter() - t0)
+                self.commits += 1
+                self.written += len(items)
+            except Exception as e:
+                self.errors += 1
+                print(f"[WARN] {self.name}: dropped {len(items)} record(s): {e}", file=sys.stderr)
+        try:
+            self._finish()
+        except Exception as e:
+            print(f"[WARN] {self.name}: {e}", file=sys.stderr)
+
+    def _commit(self, items: list):
+        raise NotImplementedError
+
+    def _finish(self):
+        pass
+
+def gzip_file(path: Path) -> Path:
+    """Compress `path` to `path.gz` (via a temp file) and remove the original."""
+    gz = path.with_name(path.name + ".gz")
+    tmp = gz.with_name(gz.name + ".tmp")
+    with open(path, "rb") as src, gzip.open(tmp, "wb") as dst:
+        shutil.copyfileobj(src, dst, 1 << 20)
+    os.replace(tmp, gz)
+    path.unlink()
+    return gz
+
+class JSONLSink(BatchSink):
+    """
+    JSONL alert log with group commit, optional fsync, and segment rotation.
+
+    fsync: "none" (leave it to the OS), "batch" (after every group commit) or
+    "segment" (when a segment is retired and on close). A segment is retired once
+    it reaches `rotate_bytes` or is `rotate_secs` old (checked when writing), is
+    renamed to `<path>.<UTC stamp>` and gzipped on a separate thread.
+    """
+    FSYNC = ("none", "batch", "segment")
+    NAME = "jsonl"
+
+    def __init__(self, path, flush_ms: int = 0, fsync: str = "none",
+                 rotate_bytes: int = 0, rotate_secs: int = 0):
+        self.path = Path(path)
+        self.fsync = fsync
+        self.rotate_bytes = rotate_bytes
+        self.rotate_secs = rotate_secs
+        self.rotations = 0
+        self._gzips: list[threading.Thread] = []
+        self._open()
+        super().__init__(flush_ms, name=self.NAME)
+
+    def _open(self):
+        self._f = open(self.path, "ab")
+        self._size = self._f.tell()
+        self._opened = time.monotonic()
+
+    def _encode(self, items: list) -> bytes:
+        # Serialized here rather than in emit(): payloads are not touched after emit.
+        return "".join(json.dumps(p) + "\n" for p in items).encode()
+
+    def _commit(self, items: list):
+        data = self._encode(items)
+        self._f.write(data)
+        self._f.flush()
+        if self.fsync == "batch":
+            os.fsync(self._f.fileno())
+        self._size += len(data)
+        if ((self.rotate_bytes and self._size >= self.rotate_bytes)
+                or (self.rotate_secs and time.monotonic() - self._opened >= self.rotate_secs)):
+            self._rotate()
+
+    def _close_file(self):
+        if self.fsync != "none":
+            os.fsync(self._f.fileno())
+        self._f.close()
+
+    def _rotate(self):
+        self._close_file()
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        retired = self.path.with_name(f"{self.path.name}.{stamp}")
+        n = 0
+        while retired.exists() or retired.with_name(retired.name + ".gz").exists():
+            n += 1
+            retired = self.path.with_name(f"{self.path.name}.{stamp}-{n}")
+        os.replace(self.path, retired)
+        self._open()
+        self.rotations += 1
+        self._gzips = [t for t in self._gzips if t.is_alive()]
+        t = threading.Thread(target=self._compress, args=(retired,), name="jsonl-gzip", daemon=True)
+        t.start()
+        self._gzips.append(t)
+
+    def _compress(self, path: Path):
+        try:
+            gzip_file(path)
+        except Exception as e:
+            print(f"[WARN] jsonl: could not compress {path}: {e}", file=sys.stderr)
+
+    def _finish(self):
+        self._close_file()
+        for t in self._gzips:
+            t.join()
+
+    def stats(self) -> str:
+        return f"{super().stats()} rotations={self.rotations}"
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id       INTEGER PRIMARY KEY,
+    time     TEXT NOT NULL,  -- ISO-8601 UTC, same as the JSONL "time"
+    severity TEXT NOT NULL,
+    event    TEXT,
+    bssid    TEXT NOT NULL,
+    oui      TEXT,
+    ssid     TEXT,
+    channel  INTEGER,
+    power    INTEGER,
+    payload  TEXT NOT NULL   -- the full alert as JSON
+);
+CREATE INDEX IF NOT EXISTS alerts_bssid_time ON alerts (bssid, time);
+CREATE INDEX IF NOT EXISTS alerts_oui_time ON alerts (oui, time);
+CREATE INDEX IF NOT EXISTS alerts_severity_time ON alerts (severity, time);
+CREATE TABLE IF NOT EXISTS devices (
+    bssid      TEXT PRIMARY KEY,
+    essid      TEXT,
+    oui        TEXT,
+    severity   TEXT,
+    channel    INTEGER,
+    power      INTEGER,
+    first_seen TEXT NOT NULL,
+    last_seen  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS devices_last_seen ON devices (last_seen);
+"""
+
+class SQLiteSink(BatchSink):
+    """
+    SQLite sightings store: an `alerts` row per alert and a `devices` row per
+    matched BSSID (upserted with its latest channel/power/last_seen).
+
+    Each group commit is one transaction in WAL mode (synchronous=NORMAL), so the
+    scan loop never waits on SQLite and readers are not blocked by the writer.
+    With `retention_days`, rows older than that are deleted every
+    RETENTION_EVERY seconds and freed pages are returned with incremental vacuum.
+    """
+    RETENTION_EVERY = 3600
+
+    def __init__(self, path, retention_days: float = 0, flush_ms: int = 0):
+        self.path = Path(path)
+        self.retention_days = retention_days
+        self.pruned = 0
+        self._db: sqlite3.Connection | None = None
+        self._next_prune = 0.0
+        # Create the schema up front so a bad path fails at startup, not in the writer.
+        db = sqlite3.connect(self.path)
+        try:
+            db.execute("PRAGMA auto_vacuum=INCREMENTAL")  # only takes effect on a new file
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SQLITE_SCHEMA)
+        finally:
+            db.close()
+        super().__init__(flush_ms, name="sqlite")
+
+    def device(self, row: tuple):
+        self._pending.append(row)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened on the writer thread: sqlite3 connections stay on their creating thread.
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        return self._db
+
+    def _commit(self, items: list):
+        alerts = []
+        devices = []
+        for item in items:
+            if type(item) is tuple:
+                devices.append(item)
+            else:
+                alerts.append((item["time"], item["severity"], item.get("event"), item["bssid"],
+                               item.get("oui"), item.get("ssid"), _int_or_none(item.get("channel")),
+                               _int_or_none(item.get("power")), json.dumps(item)))
+        db = self._connect()
+        db.execute("BEGIN")
+        try:
+            db.executemany("INSERT INTO alerts (time, severity, event, bssid, oui, ssid, channel, power, payload) "
+                           "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", alerts)
+            db.executemany("INSERT INTO devices (bssid, essid, oui, severity, channel, power, first_seen, last_seen) "
+                           "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (bssid) DO UPDATE SET "
+                           "essid=excluded.essid, oui=excluded.oui, severity=excluded.severity, "
+                           "channel=excluded.channel, power=excluded.power, last_seen=excluded.last_seen",
+                           devices)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        if self.retention_days and time.monotonic() >= self._next_prune:
+            self._next_prune = time.monotonic() + self.RETENTION_EVERY
+            self.prune()
+
+    def prune(self):
+        """Delete rows older than the retention window and compact the file."""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=self.retention_days)
+                  ).isoformat(timespec="seconds").replace("+00:00", "Z")
+        db = self._connect()
+        n = db.execute("DELETE FROM alerts WHERE time < ?", (cutoff,)).rowcount
+        n += db.execute("DELETE FROM devices WHERE last_seen < ?", (cutoff,)).rowcount
+        if n:
+            self.pruned += n
+            db.execute("PRAGMA incremental_vacuum")
+            db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def _finish(self):
+        if self._db is not None:
+            self._db.execute("PRAGMA optimize")
+            self._db.close()
+            self._db = None
+
+    def stats(self) -> str:
+        return f"{super().stats()} pruned={self.pruned}"
+
+# ---------------------------
+# Binary sighting log
+# ---------------------------
+# File: BINLOG_MAGIC, then frames of <tag byte><varint length><body>.
+#   RESET   clears the string table and time base (written when appending to an
+#           existing file, so each writer session decodes on its own)
+#   STRING  body is UTF-8; it gets the next id in the string table
+#   RECORD  body is <varint n> then n x (<varint key id><value>)
+# A value is a type byte followed by its data; see BinaryLogEncoder._value.
+BINLOG_MAGIC = b"DSLG\x01"
+_B_RESET, _B_STRING, _B_RECORD = 0, 1, 2
+(_V_NONE, _V_FALSE, _V_TRUE, _V_INT, _V_FLOAT, _V_STR, _V_RAW,
+ _V_INTSTR, _V_MAC, _V_TIME, _V_LIST, _V_DICT) = range(12)
+_BIN_MAC_RX = re.compile(r"[0-9A-F]{2}(?::[0-9A-F]{2}){5}")
+_BIN_TIME_RX = re.compile(r"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\dZ")
+_BIN_INTSTR_RX = re.compile(r"0|-?[1-9]\d{0,17}")
+_F64 = struct.Struct("<d")
+
+def _put_varint(n: int, out: bytearray):
+    n = (n << 1) if n >= 0 else ((-n << 1) - 1)  # zigzag: small negatives stay short
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+def _get_varint(buf: bytes, pos: int) -> tuple[int, int]:
+    n = shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            break
+        shift += 7
+    return (n >> 1) if not n & 1 else -((n + 1) >> 1), pos
+
+class BinaryLogEncoder:
+    """
+    Alert dicts -> binary frames. Lossless for anything json.dumps accepts:
+    key order and str-vs-int types survive a round trip.
+
+    Strings are interned into the string table (keys, severities, SSIDs,
+    labels, CSV paths) up to MAX_STRINGS entries, then written inline.
+    Canonical "AA:BB:CC:DD:EE:FF" MACs become 6 bytes, integer strings such as
+    channel/power become varints, and "YYYY-MM-DDTHH:MM:SSZ" times become a
+    varint delta (seconds) from the previous one.
+    """
+    MAX_STRINGS = 1 << 16
+    MAX_INTERNED_LEN = 256
+
+    def __init__(self):
+        self.strings: dict[str, int] = {}
+        self._keys: dict[str, bytes] = {}  # key -> its encoded string id
+        self._t_prev = 0
+        self._t_last = ("", 0)
+
+    def header(self) -> bytes:
+        return BINLOG_MAGIC
+
+    def reset(self) -> bytes:
+        """Frame that makes readers drop their string table (new writer session)."""
+        self.__init__()
+        return bytes((_B_RESET, 0))
+
+    def encode(self, payload: dict) -> bytes:
+        defs = bytearray()
+        body = bytearray()
+        _put_varint(len(payload), body)
+        keys = self._keys
+        for k, v in payload.items():
+            kb = keys.get(k)
+            if kb is None:
+                kb = bytearray()
+                _put_varint(self._intern(k, defs, force=True), kb)
+                kb = keys[k] = bytes(kb)
+            body += kb
+            self._value(v, body, defs)
+        defs.append(_B_RECORD)
+        _put_varint(len(body), defs)
+        defs += body
+        return bytes(defs)
+
+    def _intern(self, text: str, defs: bytearray, force: bool = False) -> int | None:
+        sid = self.strings.get(text)
+        if sid is None:
+            if not force and (len(self.strings) >= self.MAX_STRINGS or len(text) > self.MAX_INTERNED_LEN):
+                return None
+            sid = self.strings[text] = len(self.strings)
+            data = text.encode()
+            defs.append(_B_STRING)
+            _put_varint(len(data), defs)
+            defs += data
+        return sid
+
+    def _epoch(self, text: str) -> int | None:
+        if self._t_last[0] == text:
+            return self._t_last[1]
+        try:
+            t = calendar.timegm((int(text[0:4]), int(text[5:7]), int(text[8:10]),
+                                 int(text[11:13]), int(text[14:16]), int(text[17:19])))
+        except (ValueError, OverflowError):
+            return None
+        if time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(t)) != text:
+            return None  # e.g. a 60th second; keep such strings verbatim
+        self._t_last = (text, t)
+        return t
+
+    def _value(self, v, out: bytearray, defs: bytearray):
+        if type(v) is str:
+            # Fast path: SSIDs, labels, severities, paths seen before.
+            sid = self.strings.get(v)
+            if sid is not None and sid < 64:
+                out += bytes((_V_STR, sid << 1))
+                return
+            if sid is not None:
+                out.append(_V_STR)
+                _put_varint(sid, out)
+                return
+        if v is None:
+            out.append(_V_NONE)
+        elif v is True or v is False:
+            out.append(_V_TRUE if v else _V_FALSE)
+        elif isinstance(v, int):
+            out.append(_V_INT)
+            _put_varint(v, out)
+        elif isinstance(v, float):
+            out.append(_V_FLOAT)
+            out += _F64.pack(v)
+        elif isinstance(v, str):
+            if (v == self._t_last[0] or _BIN_TIME_RX.fullmatch(v)) and (t := self._epoch(v)) is not None:
+                out.append(_V_TIME)
+                _put_varint(t - self._t_prev, out)
+                self._t_prev = t
+            elif _BIN_MAC_RX.fullmatch(v):
+                out.append(_V_MAC)
+                out += int(v.replace(":", ""), 16).to_bytes(6, "big")
+            elif _BIN_INTSTR_RX.fullmatch(v):
+                n = int(v)
+                if -64 <= n < 64:  # channels, most power readings
+                    out += bytes((_V_INTSTR, (n << 1) if n >= 0 else ((-n << 1) - 1)))
+                else:
+                    out.append(_V_INTSTR)
+                    _put_varint(n, out)
+            else:
+                sid = self._intern(v, defs)
+                if sid is None:
+                    data = v.encode()
+                    out.append(_V_RAW)
+                    _put_varint(len(data), out)
+                    out += data
+                else:
+                    out.append(_V_STR)
+                    _put_varint(sid, out)
+        elif isinstance(v, (list, tuple)):
+            out.append(_V_LIST)
+            _put_varint(len(v), out)
+            for item in v:
+                self._value(item, out, defs)
+        elif isinstance(v, dict):
+            out.append(_V_DICT)
+            _put_varint(len(v), out)
+            for k, item in v.items():
+                _put_varint(self._intern(str(k), defs, force=True), out)
+                self._value(item, out, defs)
+        else:
+            raise TypeError(f"cannot encode {type(v).__name__} in a binary log")
+
+class _BinaryDecoder:
+    def __init__(self):
+        self.strings: list[str] = []
+        self._t_prev = 0
+        self._t_last = (None, "")
+
+    def record(self, buf: bytes) -> dict:
+        n, pos = _get_varint(buf, 0)
+        rec = {}
+        strings = self.strings
+        for _ in range(n):
+            b = buf[pos]
+            if b < 0x80:
+                kid, pos = b >> 1, pos + 1
+            else:
+                kid, pos = _get_varint(buf, pos)
+            rec[strings[kid]], pos = self._value(buf, pos)
+        return rec
+
+    def _value(self, buf: bytes, pos: int):
+        kind = buf[pos]
+        pos += 1
+        if kind == _V_STR:
+            b = buf[pos]
+            if b < 0x80:  # string ids below 64 fit in one byte
+                return self.strings[b >> 1], pos + 1
+            sid, pos = _get_varint(buf, pos)
+            return self.strings[sid], pos
+        if kind == _V_INTSTR:
+            n, pos = _get_varint(buf, pos)
+            return str(n), pos
+        if kind == _V_MAC:
+            h = buf[pos:pos + 6].hex().upper()
+            return ":".join(h[i:i + 2] for i in range(0, 12, 2)), pos + 6
+        if kind == _V_TIME:
+            d, pos = _get_varint(buf, pos)
+            t = self._t_prev = self._t_prev + d
+            if self._t_last[0] != t:
+                self._t_last = (t, time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(t)))
+            return self._t_last[1], pos
+        if kind == _V_NONE:
+            return None, pos
+        if kind in (_V_TRUE, _V_FALSE):
+            return kind == _V_TRUE, pos
+        if kind == _V_INT:
+            return _get_varint(buf, pos)
+        if kind == _V_FLOAT:
+            return _F64.unpack_from(buf, pos)[0], pos + 8
+        if kind == _V_RAW:
+            n, pos = _get_varint(buf, pos)
+            return buf[pos:pos + n].decode(), pos + n
+        if kind == _V_LIST:
+            n, pos = _get_varint(buf, pos)
+            items = []
+            for _ in range(n):
+                item, pos = self._value(buf, pos)
+                items.append(item)
+            return items, pos
+        if kind == _V_DICT:
+            n, pos = _get_varint(buf, pos)
+            d = {}
+            for _ in range(n):
+                kid, pos = _get_varint(buf, pos)
+                d[self.strings[kid]], pos = self._value(buf, pos)
+            return d, pos
+        raise ValueError(f"unknown value type {kind} in binary log")
+
+def _binary_frames(f, chunk: int = 1 << 20):
+    """
+    Yield (tag, body, end offset) for each frame after the header. Raises
+    ValueError at a torn or unknown frame, after yielding every complete one.
+    """
+    buf, pos, base = b"", 0, len(BINLOG_MAGIC)  # base: file offset of buf[0]
+    while True:
+        # Frame header: tag + varint length (at most 11 bytes); refill when short.
+        if len(buf) - pos < 11:
+            base += pos
+            buf, pos = buf[pos:] + f.read(chunk), 0
+            if not buf:
+                return
+        tag = buf[pos]
+        if tag not in (_B_RESET, _B_STRING, _B_RECORD):
+            raise ValueError(f"unknown frame type {tag} in binary log")
+        try:
+            size, start = _get_varint(buf, pos + 1)
+        except IndexError:
+            raise ValueError("truncated frame at end of binary log") from None
+        while len(buf) < start + size:
+            more = f.read(max(chunk, start + size - len(buf)))
+            if not more:
+                raise ValueError("truncated frame at end of binary log")
+            buf += more
+        body, pos = buf[start:start + size], start + size
+        yield tag, body, base + pos
+
+def read_binary_log(f, chunk: int = 1 << 20):
+    """Stream alert dicts from a binary log opened in binary mode."""
+    if f.read(len(BINLOG_MAGIC)) != BINLOG_MAGIC:
+        raise ValueError("not a dronescan binary log")
+    dec = _BinaryDecoder()
+    for tag, body, _ in _binary_frames(f, chunk):
+        if tag == _B_RECORD:
+            yield dec.record(body)
+        elif tag == _B_STRING:
+            dec.strings.append(body.decode())
+        else:
+            dec = _BinaryDecoder()
+
+def binary_log_intact_size(path: Path) -> int | None:
+    """
+    Length of the readable prefix of a binary log: up to the end of its last
+    complete frame, 0 if only part of the header made it to disk, or None if the
+    file does not start like a binary log at all.
+    """
+    with open(path, "rb") as f:
+        head = f.read(len(BINLOG_MAGIC))
+        if head != BINLOG_MAGIC:
+            return 0 if BINLOG_MAGIC.startswith(head) else None
+        end = len(BINLOG_MAGIC)
+        try:
+            for _, _, end in _binary_frames(f):
+                pass
+        except ValueError:
+            pass
+    return end
+
+class BinaryLogSink(JSONLSink):
+    """JSONLSink (same batching, fsync and rotation) writing the binary format."""
+    NAME = "binlog"
+
+    def _open(self):
+        # Checked before opening for append: a JSONL log (or anything else) passed to
+        # --binlog by mistake must be left alone, not cut down to a fresh header.
+        intact = binary_log_intact_size(self.path) if self.path.is_file() else 0
+        if intact is None:
+            raise ValueError(f"{self.path} exists and is not a dronescan binary log; refusing to append to it")
+        super()._open()
+        self._enc = BinaryLogEncoder()
+        if intact < self._size:
+            # A power cut can leave a torn last frame; appending after it would make
+            # everything that follows unreadable, so cut back to the last whole frame.
+            print(f"[WARN] {self.path}: dropping {self._size - intact} byte(s) of torn frame(s) at the end",
+                  file=sys.stderr)
+            self._f.truncate(intact)
+            self._size = intact
+        # A new segment starts with the header; a reopened one with a RESET frame.
+        data = self._enc.header() if self._size == 0 else self._enc.reset()
+        self._f.write(data)
+        self._size += len(data)
+
+    def _encode(self, items: list) -> bytes:
+        return b"".join(map(self._enc.encode, items))
+
+def convert_main(argv: list[str]) -> int:
+    ap = argparse.ArgumentParser(prog="dronescan.py convert",
+                                 description="Convert alert logs between JSONL and the binary format (direction is detected from the input)")
+    ap.add_argument("src", type=Path, help="JSONL or binary log (.gz accepted)")
+    ap.add_argument("dst", help="Output file, or - for stdout")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    with _open_segment(args.src) as f:
+        to_jsonl = f.read(len(BINLOG_MAGIC)) == BINLOG_MAGIC
+        f.seek(0)
+        out = sys.stdout.buffer if args.dst == "-" else open(args.dst, "wb")
+        n = 0
+        try:
+            if to_jsonl:
+                for rec in read_binary_log(f):
+                    out.write(json.dumps(rec).encode() + b"\n")
+                    n += 1
+            else:
+                enc = BinaryLogEncoder()
+                out.write(enc.header())
+                for line in f:
+                    if line.strip():
+                        out.write(enc.encode(json.loads(line)))
+                        n += 1
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+    if args.dst != "-":
+        elapsed = time.perf_counter() - t0
+        size_in, size_out = args.src.stat().st_size, Path(args.dst).stat().st_size
+        print(f"[INFO] {n} alert(s) -> {'JSONL' if to_jsonl else 'binary'}: {size_in} -> {size_out} bytes "
+              f"({size_out / max(n, 1):.1f} B/alert), {n / max(elapsed, 1e-9):,.0f} alerts/s", file=sys.stderr)
+    return 0
+
+# ---------------------------
+# JSONL log index / query
+# ---------------------------
+LOG_INDEX_VERSION = 2
+LOG_BLOCK_BYTES = 64 * 1024
+
+def log_segments(path: Path) -> list[Path]:
+    """
+    Segments of a JSONL log in time order: retired `<path>.<stamp>[-n][.gz]`
+    files written by JSONLSink, then `path` itself. A segment caught between
+    gzip and unlink is taken once, from the finished .gz.
+    """
+    rx = re.compile(re.escape(path.name) + r"\.(\d{8}T\d{6}Z)(?:-(\d+))?(\.gz)?$")
+    found: dict[tuple, Path] = {}
+    for p in path.parent.glob(glob.escape(path.name) + ".*"):
+        m = rx.match(p.name)
+        if m:
+            key = (m.group(1), int(m.group(2) or 0))
+            if m.group(3) or key not in found:
+                found[key] = p
+    segments = [found[k] for k in sorted(found)]
+    if path.exists():
+        segments.append(path)
+    return segments
+
+def _open_segment(path: Path):
+    return gzip.open(path, "rb") if path.suffix == ".gz" else open(path, "rb")
+
+def index_segment(path: Path, entry: dict | None = None) -> dict:
+    """
+    Index one segment in LOG_BLOCK_BYTES blocks of whole lines.
+
+    Each block records (start, end, first time, last time); `postings` maps
+    "b:<bssid>", "o:<oui>", "l:<label>", "s:<severity>" and "c:<channel>" to the
+    sorted ids of blocks holding such a record. Given the previous `entry` for a
+    file that has only grown since, only the new tail is read.
+    """
+    st = path.stat()
+    with _open_segment(path) as f:
+        head = f.read(256).hex()
+        if (entry and entry["ino"] == st.st_ino and head.startswith(entry["head"])
+                and entry["end"] <= st.st_size):
+            blocks, postings, pos = entry["blocks"], entry["postings"], entry["end"]
+        else:
+            blocks, postings, pos = [], {}, 0
+        f.seek(pos)
+        block = blocks[-1] if blocks else None
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # a record the writer has not finished; picked up next time
+            start, pos = pos, pos + len(line)
+            try:
+                rec = json.loads(line)
+                t = rec["time"]
+            except (ValueError, KeyError, TypeError):
+                continue
+            if not isinstance(t, str):
+                continue  # e.g. "time": null; unorderable against the other records
+            if block is None or start - block[0] >= LOG_BLOCK_BYTES:
+                block = [start, pos, t, t]
+                blocks.append(block)
+            block[1], block[2], block[3] = pos, min(block[2], t), max(block[3], t)
+            bid = len(blocks) - 1
+            keys = [f"b:{rec.get('bssid')}", f"o:{rec.get('oui')}", f"s:{rec.get('severity')}",
+                    f"c:{rec.get('channel')}"]
+            keys.extend(f"l:{label}" for label in rec.get("ssid_labels") or ())
+            for key in keys:
+                ids = postings.setdefault(key, [])
+                if not ids or ids[-1] != bid:
+                    ids.append(bid)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "ino": st.st_ino, "head": head,
+            "end": pos, "blocks": blocks, "postings": postings}
+
+class LogIndex:
+    """
+    Sidecar index (`<log>.idx`) over every segment of a JSONL log.
+
+    Retired segments never change, so they are indexed once; the live file is
+    extended incrementally. refresh() brings the index up to date and saves it
+    (atomically) when anything changed. The index is plain JSON: logs (and their
+    sidecars) get copied off sensors, so loading one must not run code.
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        self.idx_path = self.path.with_name(self.path.name + ".idx")
+        self.segments: dict[str, dict] = {}
+        self.indexed = 0
+        try:
+            data = json.loads(self.idx_path.read_bytes())
+            if data.get("version") == LOG_INDEX_VERSION:
+                self.segments = data["segments"]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[WARN] rebuilding unreadable index {self.idx_path}: {e}", file=sys.stderr)
+
+    def refresh(self, rebuild: bool = False) -> list[Path]:
+        paths = log_segments(self.path)
+        live = {}
+        changed = rebuild or set(self.segments) != {p.name for p in paths}
+        for p in paths:
+            entry = None if rebuild else self.segments.get(p.name)
+            st = p.stat()
+            if entry is None or (entry["size"], entry["mtime_ns"]) != (st.st_size, st.st_mtime_ns):
+                entry = index_segment(p, entry)
+                self.indexed += 1
+                changed = True
+            live[p.name] = entry
+        self.segments = live
+        if changed:
+            tmp = self.idx_path.with_name(self.idx_path.name + f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({"version": LOG_INDEX_VERSION, "segments": live}, separators=(",", ":")))
+            os.replace(tmp, self.idx_path)
+        return paths
+
+def parse_query_time(text: str) -> str:
+    """'7d' / '12h' / '30m' ago, or an ISO date/datetime (UTC unless it has an offset)."""
+    m = re.fullmatch(r"(\d+)([dhm])", text.strip())
+    if m:
+        unit = {"d": "days", "h": "hours", "m": "minutes"}[m.group(2)]
+        dt = datetime.now(timezone.utc) - timedelta(**{unit: int(m.group(1))})
+    else:
+        dt = datetime.fromisoformat(text.strip().replace("Z", "+00:00"))
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+def _block_ranges(blocks: list, ids) -> list[tuple[int, int, int]]:
+    """Coalesce adjacent block ids into (start, end, block count) byte ranges."""
+    ranges = []
+    for bid in ids:
+        start, end = blocks[bid][0], blocks[bid][1]
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end, ranges[-1][2] + 1)
+        else:
+            ranges.append((start, end, 1))
+    return ranges
+
+def query_main(argv: list[str]) -> int:
+    ap = argparse.ArgumentParser(prog="dronescan.py query",
+                                 description="Filter JSONL alert logs (incl. rotated/.gz segments) via a sidecar index")
+    ap.add_argument("log", type=Path, help="JSONL log as passed to --jsonl (its rotated segments are included)")
+    ap.add_argument("--bssid", help="Exact BSSID (AA:BB:CC:DD:EE:FF)")
+    ap.add_argument("--oui", help="OUI as reported in alerts (e.g. 60:60:1F); glob allowed")
+    ap.add_argument("--label", help="SSID rule label; glob allowed, case-insensitive (e.g. 'DJI*')")
+    ap.add_argument("--severity", help="Alert severity (e.g. DRONE_CONFIRMED, CONTROLLER_PROBE)")
+    ap.add_argument("--channel", help="Channel number")
+    ap.add_argument("--since", type=parse_query_time, help="Start time: ISO date/datetime (UTC) or 7d/12h/30m ago")
+    ap.add_argument("--until", type=parse_query_time, help="End time (exclusive), same formats as --since")
+    ap.add_argument("--count", action="store_true", help="Print only the number of matching alerts")
+    ap.add_argument("--reindex", action="store_true", help="Rebuild the index from scratch")
+    ap.add_argument("--stats", action="store_true", help="Report blocks and bytes read on stderr")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    index = LogIndex(args.log)
+    paths = index.refresh(rebuild=args.reindex)
+
+    # Each filter is (posting key, or a (prefix, predicate) pair for globs, predicate on a record).
+    filters = []
+    if args.bssid:
+        want = args.bssid.upper()
+        filters.append((f"b:{want}", lambda r: r.get("bssid") == want))
+    if args.oui:
+        pat = args.oui.upper()
+        filters.append((("o:", lambda v: fnmatch.fnmatchcase(v, pat)),
+                        lambda r: fnmatch.fnmatchcase(str(r.get("oui")), pat)))
+    if args.label:
+        pat = args.label.casefold()
+        filters.append((("l:", lambda v: fnmatch.fnmatchcase(v.casefold(), pat)),
+                        lambda r: any(fnmatch.fnmatchcase(lb.casefold(), pat) for lb in r.get("ssid_labels") or ())))
+    if args.severity:
+        sev = args.severity.upper()
+        filters.append((f"s:{sev}", lambda r: r.get("severity") == sev))
+    if args.channel:
+        ch = args.channel
+        filters.append((f"c:{ch}", lambda r: str(r.get("channel")) == ch))
+
+    try:
+        matched, blocks_read, blocks_total, bytes_read = _run_query(args, index, paths, filters, sys.stdout)
+    except BrokenPipeError:
+        # Output piped into `head` & co.: stop quietly, like grep.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    if args.count:
+        print(matched)
+    if args.stats:
+        print(f"[INFO] {matched} alert(s) from {len(paths)} segment(s); read {blocks_read}/{blocks_total} blocks "
+              f"({bytes_read / 2**20:.1f} MiB), {index.indexed} segment(s) (re)indexed, "
+              f"{(time.perf_counter() - t0) * 1000:.0f} ms", file=sys.stderr)
+    return 0
+
+def _run_query(args, index: LogIndex, paths: list[Path], filters: list, out) -> tuple[int, int, int, int]:
+    matched = blocks_read = blocks_total = bytes_read = 0
+    for p in paths:
+        entry = index.segments[p.name]
+        blocks = entry["blocks"]
+        blocks_total += len(blocks)
+        postings = entry["postings"]
+        ids = set(range(len(blocks)))
+        for key, _ in filters:
+            if isinstance(key, str):
+                ids &= set(postings.get(key, ()))
+            else:
+                prefix, key_ok = key
+                hit = set()
+                for k, bids in postings.items():
+                    if k.startswith(prefix) and key_ok(k[len(prefix):]):
+                        hit.update(bids)
+                ids &= hit
+        if args.since or args.until:
+            ids = {b for b in ids if (not args.since or blocks[b][3] >= args.since)
+                   and (not args.until or blocks[b][2] < args.until)}
+        if not ids:
+            continue
+        with _open_segment(p) as f:
+            for start, end, n in _block_ranges(blocks, sorted(ids)):
+                f.seek(start)
+                data = f.read(end - start)
+                blocks_read += n
+                bytes_read += len(data)
+                for line in data.splitlines():
+                    try:
+                        rec = json.loads(line)
+                        t = rec["time"]
+                    except (ValueError, KeyError, TypeError):
+                        continue  # torn or foreign line; index_segment skips these too
+                    if not isinstance(t, str):
+                        continue
+                    if (args.since and t < args.since) or (args.until and t >= args.until):
+                        continue
+                    if all(ok(rec) for _, ok in filters):
+                        matched += 1
+                        if not args.count:
+                            out.write(line.decode() + "\n")
+    out.flush()
+    return matched, blocks_read, blocks_total, bytes_read
+
 # ---------------------------
 # Airodump management
 # ---------------------------
@@ -176,6 +2559,7 @@ class AirodumpRunner:
         self.write_interval = write_interval
         self.airodump_bin = airodump_bin
         self.proc: subprocess.Popen | None = None
+        self.started_at = 0.0  # time.monotonic() of the last start()
 
     def start(self):
         cmd = [self.airodump_bin, self.iface, "--output-format", "csv", "--write", str(self.prefix), "--write-interval", str(self.write_interval)]
@@ -186,6 +2570,7 @@ class AirodumpRunner:
             cmd += ["--band", self.band]
         # Run with lower priority to be nice
         self.proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT, text=False)
+        self.started_at = time.monotonic()
         return cmd
 
     def stop(self):
@@ -199,10 +2584,241 @@ class AirodumpRunner:
             except Exception:
                 pass
 
+class RotationPolicy:
+    """
+    Decides when to restart airodump-ng into a fresh --write prefix.
+
+    airodump keeps every AP it has ever seen in its CSV, so without a cut the
+    file (and every parse of it) grows for the lifetime of the process. A limit
+    of 0 disables that criterion.
+    """
+    def __init__(self, max_rows: int = 0, max_bytes: int = 0, max_age: float = 0):
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_rows or self.max_bytes or self.max_age)
+
+    def due(self, rows: int, size: int, age: float) -> str | None:
+        """Return the reason a rotation is due, or None."""
+        if self.max_rows and rows >= self.max_rows:
+            return f"{rows} rows"
+        if self.max_bytes and size >= self.max_bytes:
+            return f"{size} bytes"
+        if self.max_age and age >= self.max_age:
+            return f"{int(age)}s old"
+        return None
+
+def rotated_prefix(base: Path, generation: int) -> Path:
+    """Prefix for the Nth airodump restart; generation 0 is the base prefix itself."""
+    return base if generation == 0 else base.with_name(f"{base.name}.r{generation:04d}")
+
+def remove_csvs(paths) -> int:
+    """Delete the given CSVs; returns how many were removed."""
+    removed = 0
+    for p in paths:
+        try:
+            p.unlink()
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+# ---------------------------
+# Offline batch scan
+# ---------------------------
+_offline_classifier: Classifier | None = None
+
+def _epoch_to_iso(ts: float | None) -> str | None:
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+def _offline_init(include_modules: bool, cache_path: Path | None):
+    """Pool initializer: load the rules once per worker process."""
+    global _offline_classifier
+    ouis, matcher, _, _, _ = load_rules(include_modules, cache_path)
+    _offline_classifier = Classifier(ouis, CachedSSIDMatcher(matcher))
+
+def _offline_scan(path: str) -> tuple[str, int, int, list[tuple[float, dict]], str | None]:
+    """
+    Classify one archived CSV: (path, AP rows, station rows, [(first_seen epoch,
+    alert)] sorted by time, error). Only matched rows are sent back to the parent.
+    A row with no parseable first/last seen is stamped with the CSV's mtime, so
+    every alert has a time (and last_seen) the sinks and the query index rely on.
+    """
+    classifier = _offline_classifier
+    stations: list[dict] = []
+    if not os.path.isfile(path):
+        return path, 0, 0, [], "no such file"  # parse_airodump_csv treats a missing CSV as empty
+    try:
+        aps = parse_airodump_csv(Path(path), stations)
+        file_time = os.path.getmtime(path)
+    except (OSError, csv.Error) as e:
+        return path, 0, 0, [], str(e)
+    hits = []
+    for row in aps:
+        mac = row["mac"]
+        if mac is None:
+            continue
+        severity, oui, ssid_hits = classifier.classify(mac, row["essid"])
+        if not severity:
+            continue
+        first = airodump_time_to_epoch(row["first_seen"])
+        last = airodump_time_to_epoch(row["last_seen"])
+        seen = first or last or file_time
+        hits.append((seen, {
+            "time": _epoch_to_iso(seen),
+            "severity": severity,
+            "event": None,
+            "bssid": row["bssid"].upper(),
+            "channel": row["channel"],
+            "power": row["power"],
+            "ssid": row["essid"] or None,
+            "oui": oui,
+            "ssid_labels": list(ssid_hits) or None,
+            "last_seen": _epoch_to_iso(last or seen),
+            "source": "dronescan(offline)",
+            "csv": path,
+        }))
+    for st_row in stations:
+        if st_row["mac"] is None:
+            continue
+        for probed in st_row["probed"]:
+            ssid_hits = classifier.ssids.match(probed)
+            if not ssid_hits:
+                continue
+            first = airodump_time_to_epoch(st_row["first_seen"])
+            last = airodump_time_to_epoch(st_row["last_seen"])
+            seen = first or last or file_time
+            hits.append((seen, {
+                "time": _epoch_to_iso(seen),
+                "severity": "CONTROLLER_PROBE",
+                "bssid": st_row["station"],
+                "associated_bssid": st_row["bssid"] or None,
+                "channel": None,
+                "power": st_row["power"],
+                "ssid": probed,
+                "oui": None,
+                "ssid_labels": list(ssid_hits),
+                "last_seen": _epoch_to_iso(last or seen),
+                "source": "dronescan(offline)",
+                "csv": path,
+            }))
+    hits.sort(key=lambda h: h[0])
+    return path, len(aps), len(stations), hits, None
+
+def expand_inputs(patterns: list[str]) -> list[str]:
+    """Files, directories (their *.csv) and globs -> sorted unique paths."""
+    paths = set()
+    for pat in patterns:
+        if os.path.isdir(pat):
+            paths.update(glob.glob(os.path.join(pat, "*.csv")))
+        elif glob.has_magic(pat):
+            paths.update(p for p in glob.glob(pat, recursive=True) if os.path.isfile(p))
+        else:
+            paths.add(pat)
+    return sorted(paths)
+
+def offline_main(argv: list[str]) -> int:
+    ap = argparse.ArgumentParser(prog="dronescan.py offline",
+                                 description="Re-scan archived airodump-ng CSVs with the current OUI/SSID rules")
+    ap.add_argument("inputs", nargs="+", help="CSV files, directories or globs (quote them, e.g. 'missions/**/*.csv')")
+    ap.add_argument("--workers", type=int, default=0, help="Worker processes (default: one per CPU; 1 = no pool)")
+    ap.add_argument("--include-modules", action="store_true", help="Also load data/oui_modules.csv")
+    ap.add_argument("--dedup-secs", type=int, default=120, help="Suppress identical alerts within N seconds of CSV time (default: 120)")
+    ap.add_argument("--jsonl", help="Write alerts to this JSONL file")
+    ap.add_argument("--binlog", help="Write alerts to this binary log")
+    ap.add_argument("--sqlite", help="Write alerts and device state to this SQLite database")
+    ap.add_argument("--rules-cache", type=Path, default=None, help="Precompiled rules artifact (default: $XDG_CACHE_HOME/dronescan/rules.json)")
+    ap.add_argument("--no-rules-cache", action="store_true", help="Always parse data/*.csv and rules/ssids.yml")
+    ap.add_argument("--quiet", action="store_true", help="Suppress console alerts")
+    args = ap.parse_args(argv)
+
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        print("[ERROR] no input files", file=sys.stderr)
+        return 2
+    cache_path = None if args.no_rules_cache else (args.rules_cache or default_rules_cache())
+    # Load once up front so a stale cache is rebuilt here, not by every worker at once.
+    load_rules(args.include_modules, cache_path)
+    workers = min(args.workers or os.cpu_count() or 1, len(paths))
+
+    t0 = time.perf_counter()
+    if workers == 1:
+        _offline_init(args.include_modules, cache_path)
+        results = list(map(_offline_scan, paths))
+    else:
+        with ProcessPoolExecutor(workers, initializer=_offline_init,
+                                 initargs=(args.include_modules, cache_path)) as pool:
+            results = list(pool.map(_offline_scan, paths, chunksize=max(1, len(paths) // (workers * 4))))
+    t_scan = time.perf_counter() - t0
+
+    sinks: list[BatchSink] = []
+    try:
+        if args.jsonl:
+            sinks.append(JSONLSink(args.jsonl))
+        if args.binlog:
+            sinks.append(BinaryLogSink(args.binlog))
+        if args.sqlite:
+            sinks.append(SQLiteSink(args.sqlite))
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 2
+    # Merge the per-file (sorted) hit lists in time order; the first sighting of a
+    # BSSID is always reported, repeats across files go through dedup as in the live loop.
+    dedup = DedupTable(args.dedup_secs)
+    seen: set[str] = set()
+    rows = stations = alerts = 0
+    try:
+        for path, n_aps, n_st, _, error in results:
+            rows += n_aps
+            stations += n_st
+            if error:
+                print(f"[WARN] {path}: {error}", file=sys.stderr)
+        for ts, p in heapq.merge(*(r[3] for r in results), key=lambda h: h[0]):
+            sev = p["severity"]
+            if sev == "CONTROLLER_PROBE":
+                key = (sev, p["bssid"], p["ssid"])
+            else:
+                key = (sev, p["bssid"][:8] if p["oui"] else 0, p["ssid"] or "")
+                if p["bssid"] not in seen:
+                    seen.add(p["bssid"])
+                    p["event"] = TrackTable.APPEARED
+            if not dedup.should_emit(key, ts) and not p.get("event"):
+                continue
+            alerts += 1
+            if not args.quiet:
+                print(format_alert(p))
+            for sink in sinks:
+                sink.emit(p)
+                if sev != "CONTROLLER_PROBE":
+                    sink.device((p["bssid"], p["ssid"], p["oui"], sev, _int_or_none(p["channel"]),
+                                 _int_or_none(p["power"]), p["time"], p["last_seen"]))
+            if alerts % 10000 == 0:
+                for sink in sinks:
+                    sink.flush()
+    finally:
+        for sink in sinks:
+            sink.close()
+    elapsed = time.perf_counter() - t0
+    print(f"[INFO] offline: {len(paths)} file(s), {rows} AP + {stations} station rows in {elapsed:.2f}s "
+          f"({len(paths) / max(t_scan, 1e-9):,.1f} files/s, {rows / max(t_scan, 1e-9):,.0f} rows/s on {workers} worker(s)); "
+          f"{alerts} alert(s), {dedup.suppressed} suppressed by dedup", file=sys.stderr)
+    return 0
+
 # ---------------------------
 # Main
 # ---------------------------
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "query":
+        sys.exit(query_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "convert":
+        sys.exit(convert_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "offline":
+        sys.exit(offline_main(sys.argv[2:]))
     ap = argparse.ArgumentParser(description="dronescan (airodump-ng backend): OUI & SSID alerting")
     ap.add_argument("--iface", required=True, help="Monitor-mode interface (e.g., wlan0mon)")
     ap.add_argument("--band", choices=["a", "b", "g", "bg", "abg"], help="Airodump band hopping (e.g., bg)")
@@ -210,33 +2826,88 @@ def main():
     ap.add_argument("--write-interval", type=int, default=2, help="CSV refresh interval in seconds (default: 2)")
     ap.add_argument("--include-modules", action="store_true", help="Also include OUIs from data/oui_modules.csv")
     ap.add_argument("--jsonl", help="Write JSONL alerts to this file")
+    ap.add_argument("--jsonl-flush-ms", type=int, default=0, help="Let the JSONL writer gather alerts for up to N ms per write (default: 0)")
+    ap.add_argument("--jsonl-fsync", choices=JSONLSink.FSYNC, default="none", help="fsync JSONL after every write (batch), on rotation/exit (segment), or never (default: none)")
+    ap.add_argument("--jsonl-rotate-bytes", type=int, default=0, help="Start a new JSONL segment once the file reaches N bytes; retired segments are gzipped (default: off)")
+    ap.add_argument("--jsonl-rotate-secs", type=int, default=0, help="Start a new JSONL segment every N seconds (default: off)")
+    ap.add_argument("--binlog", help="Also write alerts in the compact binary format (see the convert subcommand)")
+    ap.add_argument("--binlog-rotate-bytes", type=int, default=0, help="Start a new binary log segment at N bytes; retired segments are gzipped (default: off)")
+    ap.add_argument("--sqlite", help="Also store alerts and matched devices in this SQLite database (WAL mode)")
+    ap.add_argument("--sqlite-retention-days", type=float, default=0, help="Delete SQLite rows older than N days, checked hourly (default: keep all)")
     ap.add_argument("--dedup-secs", type=int, default=120, help="Suppress identical alerts within N seconds (default: 120)")
+    ap.add_argument("--dedup-max", type=int, default=100000, help="Cap on remembered alert keys; oldest are evicted first (0 = unbounded; default: 100000)")
+    ap.add_argument("--track-max", type=int, default=50000, help="Cap on tracked BSSIDs; least recently seen are dropped (0 = unbounded; default: 50000)")
+    ap.add_argument("--rssi-window", type=int, default=8, help="RSSI samples kept per tracked BSSID (default: 8)")
+    ap.add_argument("--trend-db", type=float, default=6.0, help="RSSI rise/fall (dB, newer vs older half of the window) that raises APPROACHING/DEPARTING (default: 6)")
+    ap.add_argument("--gone-secs", type=int, default=60, help="Report a matched device GONE after N seconds without a CSV update (0 = never; default: 60)")
+    ap.add_argument("--power-bucket-db", type=int, default=10, help="Power change granularity (dB) that counts as an UPDATED event; half a bucket of hysteresis absorbs jitter (default: 10)")
+    ap.add_argument("--columnar", action="store_true", help="Materialize each cycle's AP rows as NumPy columns and classify them vectorized (needs numpy)")
     ap.add_argument("--airodump-bin", default="airodump-ng", help="Path to airodump-ng (default: airodump-ng)")
     ap.add_argument("--prefix", help="Custom CSV prefix (directory/file). Default: temp dir.")
     ap.add_argument("--quiet", action="store_true", help="Suppress console alerts (still writes JSONL if set)")
+    ap.add_argument("--wake", choices=["auto", "inotify", "poll"], default="auto",
+                    help="How to wait for CSV updates: inotify events or fixed --write-interval polling (default: auto)")
+    ap.add_argument("--rotate-rows", type=int, default=0, help="Restart airodump-ng into a fresh CSV once it holds N AP rows (default: off)")
+    ap.add_argument("--rotate-bytes", type=int, default=0, help="Restart airodump-ng once its CSV reaches N bytes (default: off)")
+    ap.add_argument("--rotate-secs", type=int, default=0, help="Restart airodump-ng every N seconds (default: off)")
+    ap.add_argument("--rules-cache", type=Path, default=None, help="Precompiled rules artifact (default: $XDG_CACHE_HOME/dronescan/rules.json)")
+    ap.add_argument("--no-rules-cache", action="store_true", help="Always parse data/*.csv and rules/ssids.yml at startup")
+    ap.add_argument("--ssid-cache-size", type=int, default=4096, help="ESSIDs whose SSID-rule result is memoized (LRU; 0 disables; default: 4096)")
+    ap.add_argument("--stats-secs", type=int, default=0, help="Print a [STATS] line every N seconds (default: off)")
+    ap.add_argument("--latency-field", action="store_true",
+                    help="Add a `latency` object (seconds per hop, last_seen -> CSV write -> parse -> emit) to each alert")
+    ap.add_argument("--profile", type=int, default=0, metavar="N",
+                    help="On SIGUSR1 cProfile the next N cycles, on SIGUSR2 snapshot tracemalloc after N cycles; "
+                         "reports go to --profile-dir (default: off)")
+    ap.add_argument("--profile-dir", type=Path, default=None,
+                    help="Where --profile reports go (default: the --prefix directory, or the current directory "
+                         "when the CSVs live in a temp dir that is removed on exit)")
+    ap.add_argument("--metrics-port", type=int, default=0, help="Serve Prometheus metrics on http://ADDR:PORT/metrics (default: off)")
+    ap.add_argument("--metrics-addr", default="127.0.0.1", help="Address for --metrics-port (default: 127.0.0.1)")
     args = ap.parse_args()
 
     # Load data
-    ouis = load_ouis(include_modules=args.include_modules)
-    ssid_rules = load_ssid_rules()
+    t_load = time.perf_counter()
+    cache_path = None if args.no_rules_cache else (args.rules_cache or default_rules_cache())
+    ouis, matcher, ssid_rules, rules_key, cache_hit = load_rules(args.include_modules, cache_path)
+    load_ms = (time.perf_counter() - t_load) * 1000
+    ssid_matcher = CachedSSIDMatcher(matcher, maxsize=args.ssid_cache_size)
+    classifier = Classifier(ouis, ssid_matcher)
+    reloader = RuleReloader(args.include_modules, ssid_rules, rules_key)
+    np = load_numpy() if args.columnar else None
+    if args.columnar and np is None:
+        print("[WARN] --columnar needs NumPy; using the pure-Python path", file=sys.stderr)
 
     # Prepare output and state
-    jsonl_f = open(args.jsonl, "a", buffering=1) if args.jsonl else None
-    last_emit: dict[tuple, float] = {}  # key->timestamp for de-dup
-    def should_emit(key: tuple, now_ts: float) -> bool:
-        prev = last_emit.get(key, 0)
-        if now_ts - prev >= args.dedup_secs:
-            last_emit[key] = now_ts
-            return True
-        return False
+    sinks: list[BatchSink] = []
+    try:
+        if args.jsonl:
+            sinks.append(JSONLSink(args.jsonl, flush_ms=args.jsonl_flush_ms, fsync=args.jsonl_fsync,
+                                   rotate_bytes=args.jsonl_rotate_bytes, rotate_secs=args.jsonl_rotate_secs))
+        if args.binlog:
+            sinks.append(BinaryLogSink(args.binlog, rotate_bytes=args.binlog_rotate_bytes))
+        if args.sqlite:
+            sinks.append(SQLiteSink(args.sqlite, retention_days=args.sqlite_retention_days))
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(2)
+    metrics = Metrics()
+    metrics_server = serve_metrics(metrics, args.metrics_addr, args.metrics_port) if args.metrics_port else None
+    parser = IncrementalCSVParser()
+    dedup = DedupTable(args.dedup_secs, max_entries=args.dedup_max)
+    tracks = TrackTable(rssi_window=args.rssi_window, max_tracks=args.track_max,
+                        gone_secs=args.gone_secs, bucket_db=args.power_bucket_db)
 
     # Determine prefix path
+    tmpdir = None
     if args.prefix:
         prefix_path = Path(args.prefix).expanduser().resolve()
         prefix_path.parent.mkdir(parents=True, exist_ok=True)
     else:
         tmpdir = Path(tempfile.mkdtemp(prefix="dronescan_"))
         prefix_path = tmpdir / "scan"
+    rotation = RotationPolicy(args.rotate_rows, args.rotate_bytes, args.rotate_secs)
+    generation = 0
 
     # Start airodump-ng
     runner = AirodumpRunner(
@@ -247,93 +2918,317 @@ def main():
         write_interval=args.write_interval,
         airodump_bin=args.airodump_bin,
     )
+    watcher = CSVWatcher(prefix_path)  # before start(): snapshots CSVs that are not ours
     cmd = runner.start()
+    waiter = make_waiter(args.wake, prefix_path, args.write_interval)
+
+    # Metrics: loop counters below, everything else read from existing state at scrape time.
+    metrics.counter("dronescan_csv_rows_total", "AP rows parsed from airodump CSVs")
+    metrics.counter("dronescan_csv_rows_changed_total", "AP rows that were new or changed since the previous pass")
+    metrics.counter("dronescan_alerts_total", "Alerts emitted, by severity")
+    metrics.counter("dronescan_cycles_over_budget_total", "Cycles that took longer than --write-interval")
+    for name in ("dronescan_csv_rows_total", "dronescan_csv_rows_changed_total", "dronescan_cycles_over_budget_total"):
+        metrics.inc(name, 0)
+    metrics.counter("dronescan_dedup_suppressed_total", "Alerts suppressed by dedup", lambda: dedup.suppressed)
+    metrics.counter("dronescan_dedup_expired_total", "Dedup keys expired", lambda: dedup.expired)
+    metrics.counter("dronescan_dedup_evicted_total", "Dedup keys evicted by --dedup-max", lambda: dedup.evicted)
+    metrics.counter("dronescan_ssid_cache_hits_total", "SSID match cache hits", lambda: ssid_matcher.cache.hits)
+    metrics.counter("dronescan_ssid_cache_misses_total", "SSID match cache misses", lambda: ssid_matcher.cache.misses)
+    metrics.counter("dronescan_tracks_gone_total", "Tracked devices retired as GONE", lambda: tracks.gone)
+    metrics.counter("dronescan_rule_reloads_total", "Live rule reloads", lambda: reloader.reloads)
+    metrics.counter("dronescan_airodump_rotations_total", "airodump-ng restarts into a fresh CSV", lambda: generation)
+    metrics.counter("dronescan_sink_records_total", "Records written, by sink",
+                    lambda: [({"sink": k.name}, k.written) for k in sinks])
+    metrics.counter("dronescan_sink_errors_total", "Failed sink commits, by sink",
+                    lambda: [({"sink": k.name}, k.errors) for k in sinks])
+    metrics.gauge("dronescan_tracked_devices", "BSSIDs in the track table", lambda: len(tracks))
+    metrics.gauge("dronescan_dedup_entries", "Keys in the dedup table", lambda: len(dedup))
+    metrics.gauge("dronescan_csv_bytes", "Size of the CSV being tailed", lambda: watcher.size)
+    metrics.gauge("dronescan_csv_rows", "AP rows in the last parsed CSV", lambda: parser.rows_total)
+    metrics.gauge("dronescan_sink_queue", "Batches waiting for the sink writer",
+                  lambda: [({"sink": k.name}, k._queue.qsize()) for k in sinks])
+    metrics.gauge("dronescan_cycle_budget_seconds", "--write-interval", lambda: args.write_interval)
+    stage_help = "Time per main-loop stage (glob: find/stat the CSV; sink: hand-off to the writers)"
+    stage = {name: metrics.histogram("dronescan_stage_seconds", stage_help, stage=name)
+             for name in ("glob", "parse", "classify", "sink")}
+    cycle_time = metrics.histogram("dronescan_cycle_seconds", "Busy time of cycles that scanned a CSV")
+    detection = DetectionLatency(metrics)
+    for sink in sinks:
+        metrics.histogram("dronescan_sink_commit_seconds", "Writer-thread time per group commit",
+                          hist=sink.commit_time, sink=sink.name)
+
     if not args.quiet:
         print(f"[INFO] dronescan: started airodump-ng -> {' '.join(map(str, cmd))}")
-        print(f"[INFO] loaded {len(ouis)} OUIs and {sum(len(v) for v in ssid_rules.values())} SSID patterns")
-        print(f"[INFO] csv prefix: {prefix_path}-NN.csv (interval {args.write_interval}s)")
+        print(f"[INFO] loaded {len(ouis)} OUIs and {len(ssid_matcher)} SSID patterns "
+              f"in {load_ms:.1f} ms (rules cache {'hit' if cache_hit else 'miss' if cache_path else 'off'})")
+        print(f"[INFO] csv prefix: {prefix_path}-NN.csv (interval {args.write_interval}s, wake: {waiter.mode})")
+        if metrics_server:
+            print(f"[INFO] metrics: http://{args.metrics_addr}:{metrics_server.server_address[1]}/metrics")
 
-    # Graceful shutdown on Ctrl+C
-    def handle_sigint(sig, frame):
+    # Graceful shutdown on Ctrl+C and on SIGTERM (systemd stop, kill, timeout)
+    def handle_stop(sig, frame):
+        # A second signal would raise SystemExit again inside the cleanup below.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
         if not args.quiet:
             print("\n[INFO] stopping airodump-ng…")
         runner.stop()
-        if jsonl_f:
-            jsonl_f.close()
-        sys.exit(0)
-    signal.signal(signal.SIGINT, handle_sigint)
+        sys.exit(0)  # sinks are flushed and closed by the main loop's finally
+    signal.signal(signal.SIGINT, handle_stop)
+    signal.signal(signal.SIGTERM, handle_stop)
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, lambda sig, frame: setattr(reloader, "requested", True))
+    # Without --prefix the CSV directory is deleted on exit; reports must outlive it.
+    profile_dir = args.profile_dir or (Path.cwd() if tmpdir else prefix_path.parent)
+    profiler = CycleProfiler(profile_dir, args.profile) if args.profile else None
+    if profiler:
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, lambda sig, frame: setattr(profiler, "cpu_requested", True))
+            signal.signal(signal.SIGUSR2, lambda sig, frame: setattr(profiler, "mem_requested", True))
+        else:
+            profiler.cpu_requested = True  # no user signals here: profile the first N cycles
+        if not args.quiet:
+            print(f"[INFO] profiling: kill -USR1 {os.getpid()} (cProfile) / -USR2 (tracemalloc), "
+                  f"{args.profile} cycle(s) each -> {profile_dir}")
+
+    def apply_reload():
+        reloader.check()
+        ready = reloader.take()
+        if not ready:
+            return
+        new_ouis, _, new_matcher, recompiled = ready
+        classifier.swap(new_ouis, new_matcher)
+        if not args.quiet:
+            print(f"[INFO] reloaded rules: {len(new_ouis)} OUIs, {len(new_matcher)} SSID patterns "
+                  f"({len(recompiled)} label(s) recompiled)")
+
+    def emit(payload: dict):
+        metrics.inc("dronescan_alerts_total", severity=payload["severity"])
+        if not args.quiet:
+            print(format_alert(payload))
+        for sink in sinks:
+            sink.emit(payload)
+
+    def handle_ap(mac: int, essid: str, channel: int | None, power: int | None,
+                  severity: str | None, oui: str | None, ssid_hits: tuple, now: float, now_iso: str, csv_path: Path,
+                  last_seen: float | None, mtime: float | None):
+        track, event = tracks.update(mac, essid, channel, power, now)
+        track.severity = severity
+        if not severity:
+            return
+        if sinks:
+            device = (int_to_mac(mac), essid or None, oui, severity, channel, power, now_iso, now_iso)
+            for sink in sinks:
+                sink.device(device)
+        hops = None  # one latency sample per sighting, however many alerts it raises
+
+        def payload(sev: str) -> dict:
+            nonlocal hops
+            p = {
+                "time": now_iso,
+                "severity": sev,
+                "event": event,
+                "bssid": int_to_mac(mac),
+                "channel": "" if channel is None else str(channel),
+                "power": "" if power is None else str(power),
+                "ssid": essid or None,
+                "oui": oui,
+                "ssid_labels": list(ssid_hits) or None,
+                "clients": [int_to_mac(m) for m in sorted(parser.stations_by_bssid.get(mac, ()))] or None,
+                "source": "dronescan(airodump-ng)",
+                "csv": str(csv_path),
+            }
+            if hops is None:
+                hops = detection.observe(last_seen, mtime, now, time.time())
+            if args.latency_field:
+                p["latency"] = hops
+            return p
+
+        # Approach / departure: alert when the RSSI trend crosses --trend-db, re-arm
+        # once it falls back under half of that (hysteresis against flapping).
+        trend = track.rssi_trend()
+        if trend is not None:
+            motion = "APPROACHING" if trend >= args.trend_db else "DEPARTING" if trend <= -args.trend_db else None
+            if motion and motion != track.motion:
+                # Severity stays the classification; the trend goes in its own field.
+                p = payload(severity)
+                p["motion"] = motion
+                p["rssi_trend"] = round(trend, 1)
+                p["rssi"] = track.rssi()
+                emit(p)
+                track.motion = motion
+            elif abs(trend) < args.trend_db / 2:
+                track.motion = None
+
+        # New devices and channel/SSID/power-bucket changes are always reported;
+        # only plain repeats go through dedup.
+        key = (severity, mac >> 24 if oui else 0, essid)
+        if dedup.should_emit(key, now) or event in (TrackTable.APPEARED, TrackTable.UPDATED):
+            emit(payload(severity))
 
-    # Main loop: poll newest CSV and scan
+    def retire_tracks(now: float):
+        gone = tracks.expire(now)
+        if not gone:
+            return
+        now_iso = datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+        for track in gone:
+            if not track.severity:
+                continue
+            _, oui, ssid_hits = classifier.classify(track.mac, track.essid)
+            emit({
+                "time": now_iso,
+                "severity": track.severity,
+                "event": TrackTable.GONE,
+                "bssid": int_to_mac(track.mac),
+                "channel": "" if track.channel is None else str(track.channel),
+                "power": "" if track.power is None else str(track.power),
+                "ssid": track.essid or None,
+                "oui": oui,
+                "ssid_labels": list(ssid_hits) or None,
+                "source": "dronescan(airodump-ng)",
+                "csv": str(watcher.path) if watcher.path else None,
+            })
+
+    def scan(csv_path: Path):
+        now_iso = datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+        now = time.time()
+        mtime = watcher.mtime
+        # Only new/changed rows; repeats of an unchanged row carry no new sighting.
+        t0 = time.perf_counter()
+        if np is not None:
+            raw_aps, stations = parser.parse_raw(csv_path)
+            cols = APColumns(np, raw_aps)
+            t1 = time.perf_counter()
+            codes, ouis_by_row, labels_by_row = classifier.classify_columns(np, cols)
+            macs, channels, powers = cols.mac.tolist(), cols.channel.tolist(), cols.power.tolist()
+            na = APColumns.NA
+            for i, code in enumerate(codes.tolist()):
+                ch, pw = channels[i], powers[i]
+                seen = int(cols.last_seen[i]) or None if code else None
+                handle_ap(macs[i], cols.essid[i], None if ch == na else ch, None if pw == na else pw,
+                          SEVERITY_BY_CODE[code], ouis_by_row[i], labels_by_row[i], now, now_iso, csv_path,
+                          seen, mtime)
+        else:
+            aps, stations = parser.parse(csv_path)
+            t1 = time.perf_counter()
+            for ap_row in aps:
+                mac = ap_row["mac"]
+                if mac is None:
+                    continue
+                severity, oui, ssid_hits = classifier.classify(mac, ap_row["essid"])
+                seen = airodump_time_to_epoch(ap_row["last_seen"]) if severity else None
+                handle_ap(mac, ap_row["essid"], _int_or_none(ap_row["channel"]), _int_or_none(ap_row["power"]),
+                          severity, oui, ssid_hits, now, now_iso, csv_path, seen, mtime)
+
+        # Controllers (phones, RCs) probing for drone SSIDs, often before the drone's AP shows up.
+        for st_row in stations:
+            mac = st_row["mac"]
+            if mac is None:
+                continue
+            for probed in st_row["probed"]:
+                ssid_hits = ssid_matcher.match(probed)
+                if not ssid_hits:
+                    continue
+                key = ("CONTROLLER_PROBE", mac, probed)
+                if not dedup.should_emit(key, now):
+                    continue
+                p = {
+                    "time": now_iso,
+                    "severity": "CONTROLLER_PROBE",
+                    "bssid": st_row["station"],
+                    "associated_bssid": st_row["bssid"] or None,
+                    "channel": None,
+                    "power": st_row["power"],
+                    "ssid": probed,
+                    "oui": None,
+                    "ssid_labels": list(ssid_hits),
+                    "source": "dronescan(airodump-ng)",
+                    "csv": str(csv_path),
+                }
+                hops = detection.observe(airodump_time_to_epoch(st_row["last_seen"]), mtime, now, time.time())
+                if args.latency_field:
+                    p["latency"] = hops
+                emit(p)
+        stage["parse"].observe(t1 - t0)
+        stage["classify"].observe(time.perf_counter() - t1)
+        metrics.inc("dronescan_csv_rows_total", parser.rows_total)
+        metrics.inc("dronescan_csv_rows_changed_total", parser.rows_changed)
+
+    def rotate(reason: str):
+        nonlocal generation
+        runner.stop()
+        # Pick up whatever airodump flushed on its way out before retiring the file.
+        final = watcher.poll()
+        if final:
+            scan(final)
+        retired = watcher.produced
+        generation += 1
+        new_prefix = rotated_prefix(prefix_path, generation)
+        runner.prefix = new_prefix
+        watcher.retarget(new_prefix)
+        runner.start()
+        waiter.prefix = new_prefix
+        # Dedup state lives in main() and carries over; the parser's line table is
+        # per-file and would only hold dead rows.
+        parser.reset()
+        # Only what this generation wrote: other runs' CSVs under the prefix are kept.
+        removed = remove_csvs(retired)
+        if not args.quiet:
+            print(f"[INFO] rotated airodump-ng ({reason}) -> {new_prefix}-NN.csv; removed {removed} retired CSV(s)")
+
+    def print_stats():
+        print(f"[STATS] rows={parser.rows_total} changed={parser.rows_changed} "
+              f"stations={parser.stations_total} {ssid_matcher.stats()} {dedup.stats()} {tracks.stats()} "
+              f"{detection.stats()}"
+              + "".join(f" {sink.stats()}" for sink in sinks))
+
+    # Main loop: poll newest CSV and scan when it changes
+    next_stats = time.monotonic() + args.stats_secs
     try:
         while True:
-            csv_path = latest_csv(prefix_path)
-            if csv_path and csv_path.exists():
-                aps = parse_airodump_csv(csv_path)
-                now_iso = datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
-                now = time.time()
-                for ap_row in aps:
-                    bssid = ap_row["bssid"]
-                    essid = ap_row["essid"]
-                    ch = ap_row["channel"]
-                    pwr = ap_row["power"]
-                    if not bssid:
-                        continue
-
-                    # OUI check
-                    oui = mac_to_oui(bssid)
-                    oui_hit = oui in ouis if oui else False
-
-                    # SSID regex check
-                    ssid_hits = []
-                    if essid:
-                        for label, rxs in ssid_rules.items():
-                            if any(rx.search(essid) for rx in rxs):
-                                ssid_hits.append(label)
-
-                    severity = None
-                    if oui_hit and ssid_hits:
-                        severity = "DRONE_CONFIRMED"
-                    elif oui_hit:
-                        severity = "OUI_MATCH"
-                    elif ssid_hits:
-                        severity = "SSID_MATCH"
-
-                    if severity:
-                        key = (severity, oui if oui_hit else "", essid)
-                        if not should_emit(key, now):
-                            continue
-                        payload = {
-                            "time": now_iso,
-                            "severity": severity,
-                            "bssid": bssid,
-                            "channel": ch,
-                            "power": pwr,
-                            "ssid": essid or None,
-                            "oui": oui if oui_hit else None,
-                            "ssid_labels": ssid_hits or None,
-                            "source": "dronescan(airodump-ng)",
-                            "csv": str(csv_path),
-                        }
-                        if not args.quiet:
-                            line = f"[{payload['time']}] {severity} BSSID={bssid}"
-                            if essid:
-                                line += f" SSID='{essid}'"
-                            if oui_hit:
-                                line += f" OUI={oui}"
-                            if ssid_hits:
-                                line += " TAGS=" + ",".join(ssid_hits)
-                            if ch:
-                                line += f" CH={ch}"
-                            if pwr:
-                                line += f" PWR={pwr}"
-                            print(line)
-                        if jsonl_f:
-                            jsonl_f.write(json.dumps(payload) + "\n")
-            time.sleep(args.write_interval)
+            if profiler:
+                profiler.begin()
+            apply_reload()
+            t_cycle = time.perf_counter()
+            csv_path = watcher.poll()  # None when airodump has not rewritten the CSV
+            stage["glob"].observe(time.perf_counter() - t_cycle)
+            if csv_path:
+                scan(csv_path)
+            else:
+                dedup.expire(time.time())
+            retire_tracks(time.time())
+            t_sink = time.perf_counter()
+            for sink in sinks:
+                sink.flush()  # one hand-off per cycle; the writer threads do the I/O
+            stage["sink"].observe(time.perf_counter() - t_sink)
+            if csv_path:
+                busy = time.perf_counter() - t_cycle
+                cycle_time.observe(busy)
+                if busy > args.write_interval:
+                    metrics.inc("dronescan_cycles_over_budget_total")
+            if args.stats_secs and not args.quiet and time.monotonic() >= next_stats:
+                next_stats = time.monotonic() + args.stats_secs
+                print_stats()
+            if rotation.enabled:
+                reason = rotation.due(parser.rows_total, watcher.size, time.monotonic() - runner.started_at)
+                if reason:
+                    rotate(reason)
+            if profiler:
+                for path in profiler.end(csv_path is not None):
+                    print(f"[INFO] profile written: {path}")
+            # Sleep until the next CSV flush, but wake for the next GONE deadline.
+            deadline = tracks.next_deadline()
+            waiter.wait(None if deadline is None else max(0.0, deadline - time.time()))
     finally:
         runner.stop()
-        if jsonl_f:
-            jsonl_f.close()
+        waiter.close()
+        if metrics_server:
+            metrics_server.shutdown()
+            metrics_server.server_close()
+        for sink in sinks:
+            sink.close()
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
 
 if __name__ == "__main__":
     main()
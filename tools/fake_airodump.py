@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+fake_airodump.py — airodump-ng stand-in for load-testing dronescan without a radio.
+
+Accepts the arguments dronescan passes to airodump-ng and rewrites
+<prefix>-NN.csv every --write-interval seconds with a simulated population:
+background APs (some hidden, some re-seen each interval, a few leaving and
+new ones appearing), stations (associated or probing), and drones drawn from
+data/oui_drones.csv and rules/ssids.yml that appear, approach/depart (RSSI
+ramps, the odd channel change) and leave. Like airodump, rows of devices that
+left stay in the CSV with a stale "Last time seen".
+
+Examples:
+  python tools/dronescan.py --iface sim0 --airodump-bin tools/fake_airodump.py
+  FAKE_AIRODUMP_ARGS="--aps 100000 --stations 20000 --drones 25" \\
+    python tools/dronescan.py --iface sim0 --airodump-bin tools/fake_airodump.py --write-interval 2 --columnar
+  python tools/fake_airodump.py sim0 --write /tmp/sim/scan --aps 100000 --once
+
+Simulator options can be given on the command line or, when dronescan starts
+the simulator, through the FAKE_AIRODUMP_ARGS environment variable.
+"""
+import argparse
+import os
+import random
+import re
+import shlex
+import signal
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import dronescan  # noqa: E402
+
+sre = dronescan.sre_parse
+
+AP_HEADER = ("BSSID, First time seen, Last time seen, channel, Speed, Privacy, Cipher, "
+             "Authentication, Power, # beacons, # IV, LAN IP, ID-length, ESSID, Key")
+STATION_HEADER = "Station MAC, First time seen, Last time seen, Power, # packets, BSSID, Probed ESSIDs"
+BAND_CHANNELS = {
+    "b": list(range(1, 14)),
+    "g": list(range(1, 14)),
+    "bg": list(range(1, 14)),
+    "a": [36, 40, 44, 48, 52, 56, 60, 64, 100, 104, 108, 112, 116, 120, 124, 128, 132, 136, 140, 149, 153, 157, 161, 165],
+}
+BAND_CHANNELS["abg"] = BAND_CHANNELS["bg"] + BAND_CHANNELS["a"]
+SSID_CHARS = string.ascii_letters + string.digits + "-_ "
+HOME_SSIDS = ["HomeWifi", "FRITZ!Box 7590", "Vodafone-", "TP-Link_", "NETGEAR", "eduroam", "Guest", "iPhone", "DIRECT-"]
+
+# ---------------------------
+# Drone identities from the repo's rules
+# ---------------------------
+def sample_regex(pattern: str, rng: random.Random, max_repeat: int = 4) -> str:
+    """A random string matched by `pattern` (anchors and lookarounds are ignored)."""
+    def one_of(items) -> str:
+        choices = []
+        for op, av in items:
+            if op is sre.LITERAL:
+                choices.append(chr(av))
+            elif op is sre.RANGE:
+                choices.append(chr(rng.randint(av[0], av[1])))
+            elif op is sre.CATEGORY:
+                choices.append(category(av))
+        return rng.choice(choices) if choices else rng.choice(string.ascii_letters)
+
+    def category(cat) -> str:
+        name = str(cat)
+        if "DIGIT" in name and "NOT" not in name:
+            return rng.choice(string.digits)
+        if "SPACE" in name and "NOT" not in name:
+            return " "
+        return rng.choice(string.ascii_letters)
+
+    def gen(items) -> str:
+        out = []
+        for op, av in items:
+            if op is sre.LITERAL:
+                out.append(chr(av))
+            elif op is sre.NOT_LITERAL:
+                out.append(rng.choice([c for c in string.ascii_letters if ord(c) != av]))
+            elif op is sre.ANY:
+                out.append(rng.choice(string.ascii_letters))
+            elif op is sre.IN:
+                out.append(one_of(av))
+            elif op is sre.CATEGORY:
+                out.append(category(av))
+            elif op in (sre.MAX_REPEAT, sre.MIN_REPEAT) or str(op) == "POSSESSIVE_REPEAT":
+                lo, hi, sub = av
+                hi = lo + max_repeat if hi == sre.MAXREPEAT else min(hi, lo + max_repeat)
+                out.extend(gen(sub) for _ in range(rng.randint(lo, hi)))
+            elif op is sre.SUBPATTERN:
+                out.append(gen(av[-1]))
+            elif op is sre.BRANCH:
+                out.append(gen(rng.choice(av[1])))
+            # AT (anchors), ASSERT/ASSERT_NOT, GROUPREF: nothing to emit
+        return "".join(out)
+
+    return gen(sre.parse(pattern))
+
+def drone_ssids(rng: random.Random) -> list[tuple[str, re.Pattern]]:
+    """(label, compiled pattern) for every rules/ssids.yml entry."""
+    return [(label, rx) for label, rxs in dronescan.load_ssid_rules().items() for rx in rxs]
+
+def drone_ssid(rules: list[tuple[str, re.Pattern]], rng: random.Random) -> str:
+    for _ in range(8):
+        _, rx = rng.choice(rules)
+        core = sample_regex(rx.pattern, rng)
+        if "," in core:
+            continue  # airodump's CSV has no quoting
+        ssid = core + (f"-{rng.randrange(1 << 24):06x}" if rng.random() < 0.5 else "")
+        if rx.search(ssid):
+            return ssid
+    return "DJI-" + f"{rng.randrange(1 << 16):04X}"
+
+def drone_prefixes(include_modules: bool) -> list[tuple[int, int]]:
+    """(prefix, bits) for every OUI dronescan alerts on."""
+    return [(prefix, bits) for bits, prefix, _ in dronescan.load_ouis(include_modules).items()]
+
+# ---------------------------
+# Simulation
+# ---------------------------
+def random_mac(rng: random.Random, randomized: bool = False) -> int:
+    mac = rng.getrandbits(48)
+    first = mac >> 40
+    first = (first & 0xFC) | 0x02 if randomized else first & 0xFC  # locally administered / globally unique
+    return (first << 40) | (mac & 0xFFFFFFFFFF)
+
+def mac_in(prefix: int, bits: int, rng: random.Random) -> int:
+    return (prefix << (48 - bits)) | rng.getrandbits(48 - bits)
+
+def fmt_mac(mac: int) -> str:
+    h = f"{mac:012X}"
+    return ":".join(h[i:i + 2] for i in range(0, 12, 2))
+
+def stamp(ts: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+
+class AP:
+    __slots__ = ("bssid", "essid", "channel", "power", "first", "last", "beacons", "line")
+
+    def __init__(self, bssid: int, essid: str, channel: int, power: int, now_s: str):
+        self.bssid = fmt_mac(bssid)
+        self.essid = essid
+        self.channel = channel
+        self.power = power
+        self.first = now_s
+        self.beacons = 0
+        self.seen(now_s)
+
+    def seen(self, now_s: str):
+        self.last = now_s
+        self.beacons += random.randint(5, 40)
+        self.line = (f"{self.bssid}, {self.first}, {self.last}, {self.channel:2d},  54, WPA2, CCMP, PSK, "
+                     f"{self.power:3d}, {self.beacons:8d}, {0:8d},   0.  0.  0.   0, {len(self.essid):3d}, "
+                     f"{self.essid}, ")
+
+class Drone(AP):
+    """An AP that appears, ramps its RSSI up (approach) then down (depart), and leaves."""
+    __slots__ = ("drift", "leave_at", "turn_at")
+
+class Station:
+    __slots__ = ("mac", "bssid", "power", "first", "last", "packets", "probes", "line")
+
+    def __init__(self, mac: int, bssid: str, power: int, probes: list[str], now_s: str):
+        self.mac = fmt_mac(mac)
+        self.bssid = bssid
+        self.power = power
+        self.probes = probes
+        self.first = now_s
+        self.packets = 0
+        self.seen(now_s)
+
+    def seen(self, now_s: str):
+        self.last = now_s
+        self.packets += random.randint(1, 20)
+        self.line = (f"{self.mac}, {self.first}, {self.last}, {self.power:3d}, {self.packets:8d}, "
+                     f"{self.bssid or '(not associated) '}, {','.join(self.probes)}")
+
+class World:
+    def __init__(self, args, rng: random.Random, channels: list[int]):
+        self.args = args
+        self.rng = rng
+        self.channels = channels
+        self.rules = drone_ssids(rng)
+        self.prefixes = drone_prefixes(args.include_modules)
+        self.aps: list[AP] = []          # every AP ever seen (airodump never drops rows)
+        self.active: list[AP] = []       # background APs still around
+        self.drones: list[Drone] = []    # drones still around
+        self.stations: list[Station] = []
+        self.controllers: list[Station] = []
+        now = time.time()
+        now_s = stamp(now)
+        for _ in range(args.aps):
+            self.active.append(self._new_ap(now_s))
+        for _ in range(args.stations):
+            self.stations.append(self._new_station(now_s))
+        for _ in range(args.drones):
+            self._spawn_drone(now, now_s)
+
+    def _channel(self) -> int:
+        return self.rng.choice(self.channels)
+
+    def _new_ap(self, now_s: str) -> AP:
+        rng = self.rng
+        if rng.random() < self.args.hidden_ratio:
+            essid = ""
+        elif rng.random() < 0.5:
+            essid = rng.choice(HOME_SSIDS) + f"{rng.randrange(1 << 16):04X}"
+        else:
+            essid = "".join(rng.choice(SSID_CHARS) for _ in range(rng.randint(4, 24))).strip()
+        ap = AP(random_mac(rng, rng.random() < self.args.random_mac_ratio), essid,
+                self._channel(), rng.randint(-95, -40), now_s)
+        self.aps.append(ap)
+        return ap
+
+    def _new_station(self, now_s: str) -> Station:
+        rng = self.rng
+        bssid = rng.choice(self.active).bssid if self.active and rng.random() < 0.6 else ""
+        probes = [rng.choice(HOME_SSIDS)] if not bssid and rng.random() < 0.3 else []
+        return Station(random_mac(rng, rng.random() < self.args.random_mac_ratio), bssid,
+                       rng.randint(-95, -40), probes, now_s)
+
+    def _spawn_drone(self, now: float, now_s: str):
+        rng = self.rng
+        kind = rng.choice(("oui", "ssid", "both"))
+        if kind != "ssid" and self.prefixes:
+            mac = mac_in(*rng.choice(self.prefixes), rng)
+        else:
+            mac = random_mac(rng, randomized=rng.random() < 0.5)
+        essid = drone_ssid(self.rules, rng) if kind != "oui" and self.rules else ""
+        drone = Drone(mac, essid, self._channel(), rng.randint(-92, -85), now_s)
+        life = rng.expovariate(1 / self.args.drone_secs)
+        drone.leave_at = now + life
+        drone.turn_at = now + life * rng.uniform(0.3, 0.7)  # closest approach
+        drone.drift = rng.uniform(1, 4)
+        self.aps.append(drone)
+        self.drones.append(drone)
+        # Its pilot's phone/RC probing for the drone's SSID.
+        if essid and len(self.controllers) < self.args.controllers:
+            self.controllers.append(Station(random_mac(rng, True), "", rng.randint(-70, -40), [essid], now_s))
+
+    def tick(self, now: float):
+        rng, args = self.rng, self.args
+        now_s = stamp(now)
+        # Background: some leave (their rows go stale), as many new ones show up,
+        # and a --churn fraction of the rest is heard again this interval.
+        for _ in range(int(len(self.active) * args.turnover)):
+            self.active[rng.randrange(len(self.active))] = self._new_ap(now_s)
+        for ap in rng.sample(self.active, int(len(self.active) * args.churn)):
+            ap.power = max(-99, min(-20, ap.power + rng.randint(-2, 2)))
+            ap.seen(now_s)
+        for st in rng.sample(self.stations, int(len(self.stations) * args.churn)):
+            st.power = max(-99, min(-20, st.power + rng.randint(-2, 2)))
+            st.seen(now_s)
+
+        # Drones: ramp in, ramp out, occasionally hop; replace the ones that left.
+        alive = []
+        for d in self.drones:
+            if now >= d.leave_at:
+                continue
+            step = d.drift if now < d.turn_at else -d.drift
+            d.power = max(-95, min(-25, round(d.power + step * rng.uniform(0.5, 1.5))))
+            if rng.random() < 0.02:
+                d.channel = self._channel()
+            d.seen(now_s)
+            alive.append(d)
+        self.drones = alive
+        while len(self.drones) < args.drones and rng.random() < 0.5:
+            self._spawn_drone(now, now_s)
+        active_ssids = {d.essid for d in self.drones}
+        self.controllers = [c for c in self.controllers if c.probes[0] in active_ssids]
+        for c in self.controllers:
+            c.seen(now_s)
+
+    def csv_text(self) -> str:
+        lines = ["", AP_HEADER]
+        lines.extend(ap.line for ap in self.aps)
+        lines += ["", STATION_HEADER]
+        lines.extend(st.line for st in self.stations)
+        lines.extend(st.line for st in self.controllers)
+        lines += ["", ""]
+        return "\r\n".join(lines)
+
+# ---------------------------
+# Main
+# ---------------------------
+def next_csv(prefix: str) -> Path:
+    """<prefix>-NN.csv with the first NN not taken, like airodump-ng."""
+    for n in range(1, 1000):
+        path = Path(f"{prefix}-{n:02d}.csv")
+        if not path.exists():
+            return path
+    sys.exit(f"[ERROR] no free CSV name for prefix {prefix}")
+
+def main():
+    ap = argparse.ArgumentParser(description="airodump-ng stand-in that writes a simulated CSV")
+    ap.add_argument("iface", help="Ignored (any name)")
+    ap.add_argument("-w", "--write", required=True, help="Output prefix; writes <prefix>-NN.csv")
+    ap.add_argument("--output-format", default="csv", help="Only csv is produced; accepted for compatibility")
+    ap.add_argument("--write-interval", type=float, default=5, help="Seconds between CSV rewrites (default: 5)")
+    ap.add_argument("--band", choices=sorted(BAND_CHANNELS), help="Channels APs are placed on (default: abg)")
+    ap.add_argument("-c", "--channel", help="Comma-separated channel list (overrides --band)")
+    ap.add_argument("--aps", type=int, default=2000, help="Background APs around at any time (default: 2000)")
+    ap.add_argument("--stations", type=int, default=500, help="Client stations (default: 500)")
+    ap.add_argument("--drones", type=int, default=3, help="Drones around at any time (default: 3)")
+    ap.add_argument("--controllers", type=int, default=2, help="Max. stations probing for a live drone's SSID (default: 2)")
+    ap.add_argument("--hidden-ratio", type=float, default=0.1, help="Share of APs with a hidden SSID (default: 0.1)")
+    ap.add_argument("--random-mac-ratio", type=float, default=0.3, help="Share of locally administered (randomized) MACs (default: 0.3)")
+    ap.add_argument("--churn", type=float, default=0.5, help="Share of APs/stations heard again each interval (default: 0.5)")
+    ap.add_argument("--turnover", type=float, default=0.002, help="Share of APs leaving (and as many arriving) each interval (default: 0.002)")
+    ap.add_argument("--drone-secs", type=float, default=120, help="Mean time a drone stays around (default: 120)")
+    ap.add_argument("--include-modules", action="store_true", help="Also draw drone OUIs from data/oui_modules.csv")
+    ap.add_argument("--seed", type=int, default=None, help="Random seed (default: random)")
+    ap.add_argument("--once", action="store_true", help="Write one CSV and exit")
+    argv = shlex.split(os.environ.get("FAKE_AIRODUMP_ARGS", "")) + sys.argv[1:]
+    args = ap.parse_args(argv)
+
+    if args.channel:
+        channels = [int(c) for c in args.channel.split(",") if c.strip()]
+    else:
+        channels = BAND_CHANNELS[args.band or "abg"]
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+    signal.signal(signal.SIGTERM, lambda sig, frame: sys.exit(0))
+    signal.signal(signal.SIGINT, lambda sig, frame: sys.exit(0))
+
+    path = next_csv(args.write)
+    world = World(args, rng, channels)
+    next_write = time.monotonic()
+    while True:
+        # Rewritten in place, as airodump does: readers can catch a partial file.
+        with open(path, "w", newline="") as f:
+            f.write(world.csv_text())
+        if args.once:
+            return
+        next_write += args.write_interval
+        time.sleep(max(0.0, next_write - time.monotonic()))
+        world.tick(time.time())
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,31 @@
 #!/usr/bin/env python3
 import csv
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from dronescan import format_mac_prefix, parse_mac_prefix  # noqa: E402
+
 ROOT = Path(__file__).resolve().parents[1]
 DATA = ROOT / "data"
 CONF = ROOT / "conf"
 OUT = CONF / "oui_alerts.conf"
 
-def norm_oui(oui: str) -> str:
-    oui = oui.strip().upper().replace("-", ":")
-    parts = oui.split(":")
-    if len(parts) != 3 or any(len(p) != 2 for p in parts):
-        raise ValueError(f"Bad OUI format (want XX:XX:XX): {oui}")
-    return ":".join(parts)
+def _pairs(nibbles: str) -> str:
+    return ":".join(nibbles[i:i + 2] for i in range(0, len(nibbles), 2))
+
+def norm_oui(oui: str, prefix_len: str = "") -> tuple[int, int]:
+    """(prefix, bits) via dronescan.parse_mac_prefix, so both tools agree on the CSV."""
+    parsed = parse_mac_prefix(oui, int(prefix_len) if prefix_len.isdigit() else None)
+    if parsed is None:
+        raise ValueError(f"Bad OUI format (want XX:XX:XX, XX:XX:XX:X or XX:XX:XX:XX:X, optional /NN): {oui}")
+    return parsed
 
-def emit_line(oui: str) -> str:
-    return f"devicefound={oui}:00:00:00/FF:FF:FF:00:00:00"
+def emit_line(oui: tuple[int, int]) -> str:
+    prefix, bits = oui
+    mac = _pairs(f"{prefix << (48 - bits):012X}")
+    mask = _pairs(f"{((1 << bits) - 1) << (48 - bits):012X}")
+    return f"devicefound={mac}/{mask}"
 
 def rows_from(csv_path):
     with open(csv_path, newline="") as f:
@@ -25,7 +35,7 @@ def rows_from(csv_path):
                 continue
             yield {
                 "vendor": row["vendor"].strip(),
-                "oui": norm_oui(row["oui"]),
+                "oui": norm_oui(row["oui"], (row.get("prefix_len") or "").strip()),
                 "source_url": (row.get("source_url") or "").strip(),
                 "notes": (row.get("notes") or "").strip(),
             }
@@ -48,7 +58,7 @@ def main():
             if r["oui"] in seen:
                 continue
             seen.add(r["oui"])
-            lines.append(f"# {r['vendor']} — {r['oui']}")
+            lines.append(f"# {r['vendor']} — {format_mac_prefix(*r['oui'])}")
             lines.append(emit_line(r["oui"]))
             lines.append("")
     OUT.write_text("\n".join(lines).rstrip() + "\n")
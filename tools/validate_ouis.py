@@ -2,6 +2,9 @@
 import csv, sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from dronescan import format_mac_prefix, parse_mac_prefix  # noqa: E402
+
 ROOT = Path(__file__).resolve().parents[1]
 DATA = ROOT / "data"
 
@@ -10,26 +13,34 @@ def check_csv(path: Path) -> int:
     with open(path, newline="") as f:
         r = csv.DictReader(f)
         required = {"vendor", "oui", "source_url", "notes"}
-        if set(r.fieldnames) != required:
-            print(f"[ERROR] {path} columns must be exactly: {sorted(required)} (got {r.fieldnames})")
+        optional = {"prefix_len"}
+        if not required <= set(r.fieldnames) <= required | optional:
+            print(f"[ERROR] {path} columns must be: {sorted(required)} (+ optional {sorted(optional)}) (got {r.fieldnames})")
             return 1
         seen = set()
         for i, row in enumerate(r, start=2):
             v = (row["vendor"] or "").strip()
-            o = (row["oui"] or "").strip().upper().replace("-", ":")
+            o = (row["oui"] or "").strip()
             s = (row["source_url"] or "").strip()
             if not v or not o:
                 print(f"[ERROR] {path}:{i} vendor and oui are required")
                 errs += 1
                 continue
-            parts = o.split(":")
-            if len(parts) != 3 or any(len(p) != 2 for p in parts):
-                print(f"[ERROR] {path}:{i} bad OUI format (want XX:XX:XX): {o}")
+            # Same parser load_ouis() uses, so anything accepted here loads.
+            bits = (row.get("prefix_len") or "").strip()
+            if bits and bits not in ("24", "28", "36"):
+                print(f"[ERROR] {path}:{i} prefix_len must be 24, 28 or 36: {bits}")
+                errs += 1
+                continue
+            parsed = parse_mac_prefix(o, int(bits) if bits else None)
+            if parsed is None:
+                print(f"[ERROR] {path}:{i} bad OUI format (want XX:XX:XX, XX:XX:XX:X or XX:XX:XX:XX:X, optional /NN): {o}")
                 errs += 1
-            if o in seen:
-                print(f"[ERROR] {path}:{i} duplicate OUI: {o}")
+                continue
+            if parsed in seen:
+                print(f"[ERROR] {path}:{i} duplicate OUI: {o} (= {format_mac_prefix(*parsed)})")
                 errs += 1
-            seen.add(o)
+            seen.add(parsed)
             if s and not (s.startswith("http://") or s.startswith("https://")):
                 print(f"[WARN ] {path}:{i} source_url should be http(s): {s}")
     return errs